@@ -0,0 +1,315 @@
+'''
+Hosts games of Spaceman and MadLibs for many players at once, over a simple line
+protocol on a local TCP port or a Unix socket.
+
+Everything runs in one asyncio event loop, so thousands of connections cost a
+coroutine each rather than a process each.  The word list (memory-mapped, see
+word_source.py) and the MadLibs templates are loaded once when the server starts
+and shared by every game.  Each game is a session in an in-memory SessionStore; a
+session outlives its connection, so a player who gets disconnected can RESUME it,
+until it has been idle for the time-to-live (--ttl, in seconds) and is evicted.
+
+    python3 game_server.py [--port=8765] [--host=127.0.0.1] [--unix=/tmp/games.sock]
+        [--ttl=300]
+
+Every request and every response is one line of UTF-8 text:
+
+    NEW spaceman [easy|medium|hard|length]  ->  OK {id} SPACEMAN {pattern} {guesses left}
+    NEW madlibs [title]                     ->  OK {id} ASK {word type}
+    GUESS {letter}                          ->  HIT {pattern} {guesses left}
+                                                MISS {pattern} {guesses left}
+                                                WON {word} {guesses left}
+                                                LOST {word} 0
+    WORD {word}                             ->  ASK {word type}
+                                                STORY {story}
+    STATE                                   ->  the current game's state, as above
+    RESUME {id}                             ->  OK {id} {state}
+    QUIT                                    ->  BYE
+
+Anything that goes wrong is answered with ERR and a message.  A request longer than
+64 KB is answered with ERR, and the connection is closed.
+'''
+import asyncio
+import os
+import random
+import secrets
+import sys
+import time
+from collections import OrderedDict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [os.path.join(ROOT, 'SpaceMan_Project'), os.path.join(ROOT, 'Madlibs_Project')]
+from madlib_engine import compile_templates
+from madlibs import TEMPLATES_FILE, load_templates
+from spaceman_game import ALPHABET, SpacemanGame
+from word_source import DIFFICULTIES, WORDS_FILE, get_source
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+# Seconds a session can sit idle before it's evicted.
+DEFAULT_TTL = 300.0
+
+
+class SpacemanSession(object):
+    '''
+    A game of Spaceman, played through GUESS requests.
+    '''
+
+    def __init__(self, secret_word):
+        self.game = SpacemanGame(secret_word)
+
+    def _guesses_left(self):
+        return self.game.max_incorrect_guesses - self.game.incorrect_guesses
+
+    def state(self):
+        game = self.game
+        if game.is_word_guessed():
+            return 'WON {} {}'.format(game.secret_word, self._guesses_left())
+        if game.is_lost():
+            return 'LOST {} 0'.format(game.secret_word)
+        return 'SPACEMAN {} {}'.format(game.get_guessed_word(), self._guesses_left())
+
+    def handle(self, command, argument):
+        if command != 'GUESS':
+            raise ValueError('{} is not a Spaceman request'.format(command))
+        game = self.game
+        if game.is_over():
+            return self.state()
+        letter = argument.strip().lower()
+        if len(letter) != 1 or letter not in ALPHABET:
+            raise ValueError('guess a single letter')
+        if game.has_guessed(letter):
+            raise ValueError('{} was already guessed'.format(letter))
+        found = game.guess(letter)
+        if game.is_over():
+            return self.state()
+        return '{} {} {}'.format('HIT' if found else 'MISS', game.get_guessed_word(),
+                                 self._guesses_left())
+
+
+class MadlibsSession(object):
+    '''
+    A game of MadLibs, played by sending a WORD for each slot of a CompiledTemplate
+    in turn.
+    '''
+
+    def __init__(self, template):
+        self.template = template
+        self.words = []
+
+    def state(self):
+        slots = self.template.slots
+        if len(self.words) < len(slots):
+            return 'ASK ' + slots[len(self.words)]
+        return 'STORY ' + self.template.render(self.words)
+
+    def handle(self, command, argument):
+        if command != 'WORD':
+            raise ValueError('{} is not a MadLibs request'.format(command))
+        word = argument.strip()
+        if not word:
+            raise ValueError('send a word')
+        if len(self.words) < len(self.template.slots):
+            self.words.append(word)
+        return self.state()
+
+
+class SessionStore(object):
+    '''
+    Every live session, by ID, in order of when each was last used, so the idle ones
+    can be evicted from the front without looking at the rest.
+
+    _____Attributes______
+
+    ttl: Float.  Seconds a session can go unused before evict_idle() drops it.
+
+    _____Methods_____
+
+    create(self, session):
+        -- Stores session under a new, hard to guess ID, and returns the ID.
+
+    get(self, session_id):
+        -- Returns the session, marking it as just used, or None if there isn't one.
+
+    remove(self, session_id):
+        -- Drops a session.
+
+    evict_idle(self):
+        -- Drops every session unused for longer than ttl, and returns how many.
+    '''
+
+    def __init__(self, ttl=DEFAULT_TTL, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._sessions = OrderedDict()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def create(self, session):
+        session_id = secrets.token_hex(8)
+        self._sessions[session_id] = (session, self.clock())
+        return session_id
+
+    def get(self, session_id):
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return None
+        self._sessions[session_id] = (entry[0], self.clock())
+        return entry[0]
+
+    def remove(self, session_id):
+        self._sessions.pop(session_id, None)
+
+    def evict_idle(self):
+        oldest_allowed = self.clock() - self.ttl
+        evicted = 0
+        sessions = self._sessions
+        while sessions:
+            session_id, (session, last_used) = next(iter(sessions.items()))
+            if last_used >= oldest_allowed:
+                break
+            del sessions[session_id]
+            evicted += 1
+        return evicted
+
+
+class GameServer(object):
+    '''
+    Serves the line protocol described at the top of this file.
+
+    _____Attributes______
+
+    sessions: SessionStore.  Every game in progress.
+
+    templates: {String: CompiledTemplate}.  The MadLibs stories, by title.
+
+    _____Methods_____
+
+    handle_connection(self, reader, writer):
+        -- Answers one connection's requests until it quits or disconnects.
+
+    serve(self, host, port, path):
+        -- Starts listening on path (a Unix socket) if given, or on host and port,
+            and returns the asyncio server.
+    '''
+
+    def __init__(self, ttl=DEFAULT_TTL, words_file=WORDS_FILE, templates_file=TEMPLATES_FILE,
+                 rng=random):
+        self.sessions = SessionStore(ttl)
+        self.words = get_source(words_file)
+        self.templates = compile_templates(load_templates(templates_file))
+        self.rng = rng
+
+    def new_session(self, argument):
+        game, _, option = argument.strip().partition(' ')
+        option = option.strip()
+        if game == 'spaceman':
+            if option in DIFFICULTIES:
+                word = self.words.random_word(difficulty=option, rng=self.rng)
+            elif option.isdigit():
+                word = self.words.random_word(length=int(option), rng=self.rng)
+            elif option:
+                raise ValueError('pick easy, medium, hard or a word length')
+            else:
+                word = self.words.random_word(rng=self.rng)
+            return SpacemanSession(word)
+        if game == 'madlibs':
+            title = option or self.rng.choice(list(self.templates))
+            if title not in self.templates:
+                raise ValueError('no story called {}'.format(title))
+            return MadlibsSession(self.templates[title])
+        raise ValueError('no game called {}'.format(game))
+
+    def respond(self, session_id, line):
+        '''
+        Answers one request line, and returns the response and the session ID the
+        connection is now playing (None if it isn't playing one).
+        '''
+        command, _, argument = line.partition(' ')
+        command = command.upper()
+        if command == 'NEW':
+            session = self.new_session(argument)
+            session_id = self.sessions.create(session)
+            return 'OK {} {}'.format(session_id, session.state()), session_id
+        if command == 'RESUME':
+            session = self.sessions.get(argument.strip())
+            if session is None:
+                raise ValueError('no session {}'.format(argument.strip()))
+            return 'OK {} {}'.format(argument.strip(), session.state()), argument.strip()
+        if command == 'QUIT':
+            if session_id is not None:
+                self.sessions.remove(session_id)
+            return 'BYE', None
+        session = self.sessions.get(session_id) if session_id is not None else None
+        if session is None:
+            raise ValueError('start a game with NEW spaceman or NEW madlibs')
+        if command == 'STATE':
+            return session.state(), session_id
+        return session.handle(command, argument), session_id
+
+    async def handle_connection(self, reader, writer):
+        session_id = None
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (ValueError, asyncio.LimitOverrunError):
+                    # The line went past the reader's limit (64 KB) without ending.
+                    # There's no telling where the next request starts, so give up.
+                    writer.write(b'ERR request is too long\n')
+                    await writer.drain()
+                    break
+                if not line:
+                    break
+                try:
+                    response, session_id = self.respond(
+                        session_id, line.decode('utf-8').strip())
+                except ValueError as error:
+                    response = 'ERR {}'.format(error)
+                writer.write(response.encode('utf-8') + b'\n')
+                await writer.drain()
+                if response == 'BYE':
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def evict_periodically(self):
+        # Checking twice per TTL keeps sessions from living much past it.
+        while True:
+            await asyncio.sleep(self.sessions.ttl / 2)
+            self.sessions.evict_idle()
+
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+        if path is not None:
+            return await asyncio.start_unix_server(self.handle_connection, path)
+        return await asyncio.start_server(self.handle_connection, host, port)
+
+
+async def main(options):
+    server = GameServer(float(options.get('ttl', DEFAULT_TTL)))
+    listener = await server.serve(options.get('host', DEFAULT_HOST),
+                                  int(options.get('port', DEFAULT_PORT)), options.get('unix'))
+    print('Serving Spaceman and MadLibs on {}'.format(
+        options.get('unix') or '{}:{}'.format(options.get('host', DEFAULT_HOST),
+                                              options.get('port', DEFAULT_PORT))))
+    evictions = asyncio.ensure_future(server.evict_periodically())
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        evictions.cancel()
+
+
+if __name__ == "__main__":
+    options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+    try:
+        asyncio.run(main(options))
+    except KeyboardInterrupt:
+        pass
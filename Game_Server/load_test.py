@@ -0,0 +1,101 @@
+'''
+Load test for game_server.py: plays many games against a running server at once,
+and reports sessions per second and the latency of each turn (one request and its
+response).
+
+Every session connects, starts a game, plays it to the end (guessing letters in
+order of how common they are in English for Spaceman, and sending the same word
+for every blank in MadLibs), quits and disconnects.
+
+    python3 load_test.py [--sessions=1000] [--concurrency=100] [--game=spaceman]
+        [--host=127.0.0.1] [--port=8765] [--unix=/tmp/games.sock]
+'''
+import asyncio
+import sys
+from time import perf_counter
+from game_server import DEFAULT_HOST, DEFAULT_PORT
+
+GUESS_ORDER = 'etaoinshrdlcumwfgypbvkjxqz'
+MADLIBS_WORD = 'banana'
+
+
+async def _request(reader, writer, line, latencies):
+    started = perf_counter()
+    writer.write(line.encode('utf-8') + b'\n')
+    await writer.drain()
+    response = (await reader.readline()).decode('utf-8').rstrip('\n')
+    latencies.append(perf_counter() - started)
+    if not response or response.startswith('ERR'):
+        raise RuntimeError('{!r} was answered with {!r}'.format(line, response))
+    return response
+
+
+async def play_session(connect, game, latencies):
+    reader, writer = await connect()
+    try:
+        response = await _request(reader, writer, 'NEW ' + game, latencies)
+        if game == 'spaceman':
+            guesses = iter(GUESS_ORDER)
+            while not response.startswith(('WON', 'LOST')):
+                response = await _request(reader, writer, 'GUESS ' + next(guesses), latencies)
+        else:
+            while not response.startswith('STORY'):
+                response = await _request(reader, writer, 'WORD ' + MADLIBS_WORD, latencies)
+        await _request(reader, writer, 'QUIT', latencies)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+def percentile(values, percent):
+    '''
+    Returns the value percent% of the way through values, which must be sorted.
+    '''
+    return values[min(len(values) - 1, int(len(values) * percent / 100))]
+
+
+async def run_load_test(sessions=1000, concurrency=100, game='spaceman',
+                        host=DEFAULT_HOST, port=DEFAULT_PORT, path=None):
+    '''
+    Plays sessions games, concurrency at a time, and returns a dictionary with
+    sessions, turns, seconds, sessions_per_sec, and the p50, p99 and max turn
+    latencies in milliseconds.
+    '''
+    if path is not None:
+        def connect():
+            return asyncio.open_unix_connection(path)
+    else:
+        def connect():
+            return asyncio.open_connection(host, port)
+    latencies = []
+    remaining = iter(range(sessions))
+
+    async def worker():
+        for _ in remaining:
+            await play_session(connect, game, latencies)
+
+    started = perf_counter()
+    await asyncio.gather(*[worker() for _ in range(min(concurrency, sessions))])
+    seconds = perf_counter() - started
+    latencies.sort()
+    return {
+        'sessions': sessions, 'turns': len(latencies), 'seconds': seconds,
+        'sessions_per_sec': sessions / seconds,
+        'p50_ms': 1000 * percentile(latencies, 50),
+        'p99_ms': 1000 * percentile(latencies, 99),
+        'max_ms': 1000 * latencies[-1],
+    }
+
+
+if __name__ == "__main__":
+    options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+    results = asyncio.run(run_load_test(
+        int(options.get('sessions', 1000)), int(options.get('concurrency', 100)),
+        options.get('game', 'spaceman'), options.get('host', DEFAULT_HOST),
+        int(options.get('port', DEFAULT_PORT)), options.get('unix')))
+    print('{sessions} sessions, {turns} turns in {seconds:.2f} seconds: '
+          '{sessions_per_sec:.0f} sessions/sec, turn latency p50 {p50_ms:.2f} ms, '
+          'p99 {p99_ms:.2f} ms, max {max_ms:.2f} ms'.format(**results))
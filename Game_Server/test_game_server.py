@@ -0,0 +1,40 @@
+import asyncio
+import random
+from game_server import GameServer
+
+
+async def talk(server, path, lines):
+    # Starts server on a Unix socket, sends lines, and returns every response line
+    # until the server closes the connection.
+    listener = await server.serve(path=path)
+    async with listener:
+        reader, writer = await asyncio.open_unix_connection(path)
+        for line in lines:
+            writer.write(line)
+        await writer.drain()
+        responses = []
+        while True:
+            response = await reader.readline()
+            if not response:
+                break
+            responses.append(response.decode('utf-8').rstrip('\n'))
+        writer.close()
+        await writer.wait_closed()
+    return responses
+
+
+def test_spaceman_session(tmp_path):
+    server = GameServer(rng=random.Random(1))
+    responses = asyncio.run(talk(server, str(tmp_path / 'games.sock'),
+                                 [b'NEW spaceman easy\n', b'GUESS !\n', b'QUIT\n']))
+    assert responses[0].startswith('OK ')
+    assert ' SPACEMAN ' in responses[0]
+    assert responses[1].startswith('ERR ')
+    assert responses[2] == 'BYE'
+
+
+def test_too_long_request_is_answered_and_closed(tmp_path):
+    server = GameServer(rng=random.Random(1))
+    responses = asyncio.run(talk(server, str(tmp_path / 'games.sock'),
+                                 [b'NEW ' + b'x' * 100000 + b'\n', b'QUIT\n']))
+    assert responses == ['ERR request is too long']
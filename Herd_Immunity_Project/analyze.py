@@ -0,0 +1,180 @@
+'''
+Answers the questions from the README by streaming through simulation logfiles,
+without ever loading a whole logfile into memory.
+
+Each logfile is split into byte ranges, which are lined up with line boundaries and
+scanned in parallel by a pool of worker processes.  Workers read their range in
+fixed-size blocks and count the log lines of each kind with bytes.count(), so memory
+use stays the same however big the logfile is.  Counts are split up by the
+"Time step ..." lines, which gives a per-step series as well as the totals.
+
+Pass a logfile written by simulation.py, or the main logfile of sharded.py followed
+by its shard logfiles:
+
+    python3 analyze.py {logfile} [more logfiles...] [--processes=N] [--series=steps.csv]
+'''
+import csv
+import os
+import sys
+from multiprocessing import Pool
+from simulation import parse_args
+
+# Each kind of line counted, and the bytes that identify it.
+PATTERNS = (
+    ('infections', b' infects '),
+    ('vaccinated_saves', b' because vaccinated\n'),
+    ('already_sick', b' because already sick\n'),
+    ('did_not_infect', b" didn't infect "),
+    ('deaths', b' died from infection\n'),
+    ('survivals', b' survived infection.\n'),
+)
+FIELDS = tuple(name for name, pattern in PATTERNS)
+STEP_MARKER = b'Time step '
+DEFAULT_BLOCK_SIZE = 1 << 24
+
+
+def read_metadata(file_name):
+    '''
+    Returns the simulation parameters from the first line of a logfile as a
+    dictionary, or None if the logfile has no metadata line (like shard logfiles).
+    '''
+    with open(file_name, 'rb') as log_file:
+        fields = log_file.readline().decode('utf-8').rstrip('\n').split('\t')
+    if len(fields) != 5:
+        return None
+    return {'pop_size': int(fields[0]), 'vacc_percentage': float(fields[1]),
+            'virus_name': fields[2], 'mortality_rate': float(fields[3]),
+            'basic_repro_num': float(fields[4])}
+
+
+def _count_block(block, counts, segments):
+    # Adds up the lines in block, closing a segment at every time step line.
+    patterns = [pattern for name, pattern in PATTERNS]
+    position = 0
+    while True:
+        marker = block.find(STEP_MARKER, position)
+        stop = len(block) if marker == -1 else marker
+        for index, pattern in enumerate(patterns):
+            counts[index] += block.count(pattern, position, stop)
+        if marker == -1:
+            return counts
+        number_start = marker + len(STEP_MARKER)
+        step = int(block[number_start:block.index(b' ', number_start)])
+        segments.append((step, counts))
+        counts = [0] * len(patterns)
+        position = block.index(b'\n', marker) + 1
+
+
+def _scan_range(job):
+    # Runs in a worker.  Scans every line that starts inside [start, end).
+    file_name, start, end, block_size, has_metadata = job
+    segments = []
+    counts = [0] * len(PATTERNS)
+    with open(file_name, 'rb') as log_file:
+        if start > 0:
+            # Skip the rest of a line the previous range is responsible for.
+            log_file.seek(start - 1)
+            log_file.readline()
+        elif has_metadata:
+            log_file.readline()
+        position = log_file.tell()
+        while position < end:
+            block = log_file.read(min(block_size, end - position))
+            if not block:
+                break
+            if not block.endswith(b'\n'):
+                block += log_file.readline()
+            position = log_file.tell()
+            counts = _count_block(block, counts, segments)
+    segments.append((None, counts))
+    return segments
+
+
+def analyze(file_names, processes=None, block_size=DEFAULT_BLOCK_SIZE):
+    '''
+    Scans the logfiles and returns a dictionary with:
+        metadata: the simulation parameters, from the first logfile that has them.
+        totals: the count of each of FIELDS, plus 'interactions', over all logfiles.
+        series: {time step: counts like totals} for every time step seen.
+        answers: the README questions, as numbers.
+    '''
+    processes = processes or os.cpu_count()
+    metadata = None
+    jobs = []
+    for file_name in file_names:
+        file_metadata = read_metadata(file_name)
+        if metadata is None:
+            metadata = file_metadata
+        size = os.path.getsize(file_name)
+        range_size = max(-(-size // (processes * 4)), 1)
+        for start in range(0, size, range_size):
+            jobs.append((file_name, start, min(start + range_size, size), block_size,
+                         file_metadata is not None))
+
+    totals = [0] * len(PATTERNS)
+    series = {}
+    with Pool(processes) as pool:
+        # Ranges come back in order, so counts after the last time step line of one
+        # range carry over into the first segment of the next.
+        pending = [0] * len(PATTERNS)
+        previous_file = None
+        for job, segments in zip(jobs, pool.imap(_scan_range, jobs)):
+            if job[0] != previous_file:
+                pending = [0] * len(PATTERNS)
+                previous_file = job[0]
+            for step, counts in segments:
+                pending = [a + b for a, b in zip(pending, counts)]
+                totals = [a + b for a, b in zip(totals, counts)]
+                if step is not None:
+                    step_counts = series.setdefault(step, [0] * len(PATTERNS))
+                    series[step] = [a + b for a, b in zip(step_counts, pending)]
+                    pending = [0] * len(PATTERNS)
+
+    totals = _with_interactions(totals)
+    pop_size = metadata['pop_size'] if metadata else None
+    # Everybody who is ever infected resolves their infection exactly once.
+    ever_infected = totals['deaths'] + totals['survivals']
+    answers = {
+        'percent_infected': 100.0 * ever_infected / pop_size if pop_size else None,
+        'percent_dead': 100.0 * totals['deaths'] / pop_size if pop_size else None,
+        'vaccinated_saves': totals['vaccinated_saves'],
+    }
+    return {'metadata': metadata, 'totals': totals,
+            'series': {step: _with_interactions(counts)
+                       for step, counts in sorted(series.items())},
+            'answers': answers}
+
+
+def _with_interactions(counts):
+    counts = dict(zip(FIELDS, counts))
+    counts['interactions'] = counts['infections'] + counts['did_not_infect']
+    return counts
+
+
+def write_series(results, file_name):
+    with open(file_name, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(('time_step',) + FIELDS + ('interactions',))
+        for step, counts in results['series'].items():
+            writer.writerow([step] + [counts[name] for name in FIELDS + ('interactions',)])
+
+
+if __name__ == "__main__":
+    params, options = parse_args(sys.argv[1:])
+    processes = int(options['processes']) if 'processes' in options else None
+    results = analyze(params, processes)
+    metadata = results['metadata']
+    answers = results['answers']
+    if metadata is not None:
+        print('1. Inputs: population size {pop_size}, {vacc_percentage} vaccinated, '
+              'virus {virus_name}, mortality rate {mortality_rate}, '
+              'basic reproduction number {basic_repro_num}'.format(**metadata))
+        print('2. {:.2f}% of the population became infected.'.format(
+            answers['percent_infected']))
+        print('3. {:.2f}% of the population died from the virus.'.format(
+            answers['percent_dead']))
+    print('4. Vaccination saved someone from potential infection in {} of {} '
+          'interactions.'.format(answers['vaccinated_saves'],
+                                 results['totals']['interactions']))
+    if 'series' in options:
+        write_series(results, options['series'])
@@ -0,0 +1,132 @@
+'''
+Benchmarks the herd immunity simulation across population sizes, vaccination
+percentages and basic reproduction numbers, with fixed seeds so every run of the
+benchmark simulates exactly the same outbreaks.
+
+For every combination it reports time steps per second, interactions per second,
+peak memory (resident set size) and the wall time of each phase of the simulation
+(see profiler.py), and writes everything to a JSON file.  Each simulation runs in a
+fresh worker process, so peak memory belongs to that simulation alone.  Logs are
+written to a temporary directory and thrown away.
+
+    python3 benchmark.py [--sizes=1000,10000,100000] [--vacc=0.5,0.9] [--repro=0.1,0.25]
+        [--mortality=0.7] [--initial-infected=10] [--seed=42] [--output=benchmark.json]
+        [--compare=old_benchmark.json] [--backend=arrays] [--batched] [--buffered-log]
+        [--log-format=binary]
+
+With --compare, each result is also printed next to the matching result from an
+earlier benchmark file, so regressions between versions stand out.
+'''
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+from itertools import product
+from multiprocessing import Pool
+from time import perf_counter
+from profiler import Profiler
+from simulation import Simulation, parse_args
+
+
+def _benchmark_one(job):
+    pop_size, vacc_percentage, basic_repro_num, mortality_rate, initial_infected, seed, options = job
+    profiler = Profiler()
+    with tempfile.TemporaryDirectory() as log_dir:
+        started = perf_counter()
+        simulation = Simulation(pop_size, vacc_percentage, 'Benchmark', mortality_rate,
+                                basic_repro_num, initial_infected, seed=seed,
+                                file_name=os.path.join(log_dir, 'benchmark.txt'),
+                                profiler=profiler, **options)
+        time_steps = simulation.run()
+        wall_time = perf_counter() - started
+    interactions = sum(row[1] for row in simulation.statistics.series)
+    # ru_maxrss is in kilobytes on Linux, and in bytes on macOS.
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        peak_rss //= 1024
+    return {
+        'pop_size': pop_size, 'vacc_percentage': vacc_percentage,
+        'basic_repro_num': basic_repro_num, 'mortality_rate': mortality_rate,
+        'initial_infected': initial_infected, 'seed': seed,
+        'time_steps': time_steps, 'interactions': interactions,
+        'wall_time': wall_time,
+        'steps_per_sec': time_steps / wall_time,
+        'interactions_per_sec': interactions / wall_time,
+        'peak_rss_kb': peak_rss,
+        'phases': profiler.totals,
+    }
+
+
+def run_benchmark(sizes, vacc_percentages, repro_nums, mortality_rate=0.7,
+                  initial_infected=10, seed=42, **options):
+    '''
+    Runs one simulation per combination of sizes, vacc_percentages and repro_nums,
+    each in a fresh process, and returns a dictionary ready to be saved as JSON.
+    Extra keyword arguments (backend, batched, buffered_log, log_format) are passed
+    to every Simulation.
+    '''
+    jobs = [(pop_size, vacc_percentage, basic_repro_num, mortality_rate,
+             initial_infected, seed, options)
+            for pop_size, vacc_percentage, basic_repro_num
+            in product(sizes, vacc_percentages, repro_nums)]
+    with Pool(1, maxtasksperchild=1) as pool:
+        results = pool.map(_benchmark_one, jobs, chunksize=1)
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'options': options, 'results': results}
+
+
+def _result_key(result):
+    return (result['pop_size'], result['vacc_percentage'], result['basic_repro_num'],
+            result['mortality_rate'], result['initial_infected'], result['seed'])
+
+
+def compare(benchmark, baseline):
+    '''
+    Prints the speed of every result in benchmark relative to the matching result
+    in baseline.  A ratio below 1 means the new version is slower.
+    '''
+    baseline_results = {_result_key(result): result for result in baseline['results']}
+    for result in benchmark['results']:
+        old = baseline_results.get(_result_key(result))
+        if old is None:
+            continue
+        print('pop {:>10}  vacc {:<5} repro {:<5} {:>12.0f} interactions/sec  x{:.2f}'.format(
+            result['pop_size'], result['vacc_percentage'], result['basic_repro_num'],
+            result['interactions_per_sec'],
+            result['interactions_per_sec'] / old['interactions_per_sec']))
+
+
+def _floats(text):
+    return [float(value) for value in text.split(',')]
+
+
+if __name__ == "__main__":
+    params, options = parse_args(sys.argv[1:])
+    simulation_options = {'batched': 'batched' in options,
+                          'buffered_log': 'buffered_log' in options}
+    if 'backend' in options:
+        simulation_options['backend'] = options['backend']
+    if 'log_format' in options:
+        simulation_options['log_format'] = options['log_format']
+    benchmark = run_benchmark(
+        [int(float(size)) for size in options.get('sizes', '1000,10000,100000').split(',')],
+        _floats(options.get('vacc', '0.5,0.9')),
+        _floats(options.get('repro', '0.1,0.25')),
+        mortality_rate=float(options.get('mortality', 0.7)),
+        initial_infected=int(options.get('initial_infected', 10)),
+        seed=int(options.get('seed', 42)),
+        **simulation_options)
+    output = options.get('output', 'benchmark.json')
+    with open(output, 'w') as output_file:
+        json.dump(benchmark, output_file, indent=2)
+    for result in benchmark['results']:
+        print('pop {:>10}  vacc {:<5} repro {:<5} {:>8.1f} steps/sec {:>12.0f} interactions/sec '
+              '{:>10} KB'.format(result['pop_size'], result['vacc_percentage'],
+                                 result['basic_repro_num'], result['steps_per_sec'],
+                                 result['interactions_per_sec'], result['peak_rss_kb']))
+    if 'compare' in options:
+        with open(options['compare']) as baseline_file:
+            compare(benchmark, json.load(baseline_file))
+    print('Results written to {}'.format(output))
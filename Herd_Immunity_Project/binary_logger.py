@@ -0,0 +1,205 @@
+import atexit
+import mmap
+import struct
+import sys
+from array import array
+from itertools import chain
+from profiler import phase
+from logger import INFECTED, VACCINATED, ALREADY_SICK, NOT_INFECTED
+
+# Outcome codes for infection survival records.  Interaction records use the
+# outcome codes from logger.py.
+DIED = 4
+SURVIVED = 5
+
+MAGIC = b'HERDLOG1'
+# Every record is four little-endian unsigned 32-bit ints.
+RECORD_FIELDS = ('step', 'person1', 'person2', 'outcome')
+RECORD_SIZE = 4 * len(RECORD_FIELDS)
+
+# Default number of records a BinaryLogger holds before writing them out.
+DEFAULT_BUFFER_RECORDS = 1 << 18
+
+
+class BinaryLogger(object):
+    '''
+    Drop-in replacement for Logger that writes a compact binary event log instead
+    of text.  Has the same methods as Logger, so the Simulation can use either one.
+
+    The file starts with a header: the 8 byte MAGIC, a 4 byte length, and the same
+    tab-delimited metadata line that Logger.write_metadata() writes, padded so the
+    records that follow start on a RECORD_SIZE boundary.  After that every event is
+    one fixed-width record of (step, person1, person2, outcome):
+
+        - Interactions use the outcome codes from logger.py (INFECTED, VACCINATED,
+            ALREADY_SICK or NOT_INFECTED).
+        - Infection survival uses DIED or SURVIVED, with the person's ID in both
+            person1 and person2.
+
+    Time step markers aren't written, since every record carries its step number.
+    Use EventLog to read the file back.
+
+    _____Attributes______
+
+    file_name: the name of the file that the logger will be writing to.
+
+    step: Int.  The number of the time step currently being logged, starting at 1.
+
+    profiler: None/Profiler object.  If set, time spent writing to the logfile is
+        added to its 'logging' phase.
+    '''
+
+    def __init__(self, file_name, buffer_records=DEFAULT_BUFFER_RECORDS):
+        self.file_name = file_name
+        self.buffer_records = buffer_records
+        self.step = 1
+        self._file = None
+        self._records = array('I')
+        self.profiler = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write_metadata(self, pop_size, vacc_percentage, virus_name, mortality_rate,
+                       basic_repro_num):
+        self.close()
+        metadata = '{}\t{}\t{}\t{}\t{}\n'.format(
+            pop_size, vacc_percentage, virus_name, mortality_rate,
+            basic_repro_num).encode('utf-8')
+        header = MAGIC + struct.pack('<I', len(metadata)) + metadata
+        header += b'\x00' * (-len(header) % RECORD_SIZE)
+        self._file = open(self.file_name, 'wb')
+        atexit.register(self.close)
+        self._file.write(header)
+
+    def log_interaction(self, person1, person2, did_infect=None,
+                        person2_vacc=None, person2_sick=None):
+        if did_infect:
+            outcome = INFECTED
+        elif person2_vacc:
+            outcome = VACCINATED
+        elif person2_sick:
+            outcome = ALREADY_SICK
+        else:
+            outcome = NOT_INFECTED
+        self._records.extend((self.step, person1._id, person2._id, outcome))
+        self._flush_if_full()
+
+    def log_interactions(self, person1_ids, person2_ids, outcomes):
+        # Each field is written into every fourth slot of a zeroed block of records
+        # with one slice assignment, instead of going record by record.
+        count = len(outcomes)
+        records = array('I', [0]) * (len(RECORD_FIELDS) * count)
+        records[0::4] = array('I', [self.step]) * count
+        records[1::4] = array('I', iter(person1_ids))
+        records[2::4] = array('I', iter(person2_ids))
+        records[3::4] = array('I', iter(outcomes))
+        self._records += records
+        self._flush_if_full()
+
+    def log_infection_survival(self, person, did_die_from_infection):
+        outcome = DIED if did_die_from_infection else SURVIVED
+        self._records.extend((self.step, person._id, person._id, outcome))
+        self._flush_if_full()
+
+    def log_infection_survivals(self, person_ids, died):
+        self._records.extend(chain.from_iterable(
+            (self.step, _id, _id, DIED if did_die else SURVIVED)
+            for _id, did_die in zip(person_ids, died)))
+        self._flush_if_full()
+
+    def log_time_step(self, time_step_number, statistics=None):
+        # Per-step statistics can be rebuilt from the records, so they aren't written.
+        self.step = time_step_number + 1
+        self.flush()
+
+    def flush(self):
+        if not self._records:
+            return
+        with phase(self.profiler, 'logging'):
+            if self._file is None:
+                self._file = open(self.file_name, 'ab')
+                atexit.register(self.close)
+            if sys.byteorder == 'big':
+                self._records.byteswap()
+            self._file.write(self._records.tobytes())
+            self._file.flush()
+        self._records = array('I')
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            atexit.unregister(self.close)
+
+    def _flush_if_full(self):
+        if len(self._records) >= self.buffer_records * len(RECORD_FIELDS):
+            self.flush()
+
+
+class EventLog(object):
+    '''
+    Memory-mapped reader for the files BinaryLogger writes.  Nothing is parsed up
+    front; columns are copied straight out of the mapped records when asked for.
+
+    _____Attributes______
+
+    pop_size, vacc_percentage, virus_name, mortality_rate, basic_repro_num: the
+        simulation parameters from the file header.
+
+    _____Methods_____
+
+    column(self, name):
+        -- Returns one of RECORD_FIELDS for every event as an array of unsigned ints.
+
+    columns(self):
+        -- Returns a dictionary of every column, keyed by field name.
+    '''
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as log_file:
+            self._mmap = mmap.mmap(log_file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError('{} is not a binary simulation log'.format(file_name))
+        metadata_length, = struct.unpack_from('<I', self._mmap, len(MAGIC))
+        metadata_start = len(MAGIC) + 4
+        metadata = self._mmap[metadata_start:metadata_start + metadata_length]
+        fields = metadata.decode('utf-8').rstrip('\n').split('\t')
+        self.pop_size = int(fields[0])
+        self.vacc_percentage = float(fields[1])
+        self.virus_name = fields[2]
+        self.mortality_rate = float(fields[3])
+        self.basic_repro_num = float(fields[4])
+        header_length = metadata_start + metadata_length
+        self._records_start = header_length + (-header_length % RECORD_SIZE)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return (len(self._mmap) - self._records_start) // RECORD_SIZE
+
+    def column(self, name):
+        field = RECORD_FIELDS.index(name)
+        end = self._records_start + len(self) * RECORD_SIZE
+        with memoryview(self._mmap) as view:
+            with view[self._records_start:end].cast('I') as records:
+                values = array('I', records[field::len(RECORD_FIELDS)].tobytes())
+        if sys.byteorder == 'big':
+            values.byteswap()
+        return values
+
+    def columns(self):
+        return {name: self.column(name) for name in RECORD_FIELDS}
+
+    def close(self):
+        self._mmap.close()
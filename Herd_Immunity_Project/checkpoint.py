@@ -0,0 +1,224 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from live_sampler import LiveSampler
+
+# Files inside a checkpoint directory.
+STATE_FILE = 'state.bin'
+JOURNAL_FILE = 'journal.bin'
+DEATHS_FILE = 'deaths.bin'
+META_FILE = 'meta.json'
+
+# One journal record: person ID, then is_vaccinated, is_alive and is_infected.
+JOURNAL_RECORD = struct.Struct('<QBBB')
+
+
+def load_parameters(directory):
+    '''
+    Returns the keyword arguments the checkpointed Simulation was created with, so
+    an equivalent Simulation can be created to resume it.
+    '''
+    with open(os.path.join(directory, META_FILE)) as meta_file:
+        return json.load(meta_file)['parameters']
+
+
+class Checkpoint(object):
+    '''
+    Saves the full state of a Simulation (with the 'arrays' backend) to a directory
+    every few time steps, and restores a Simulation from it.
+
+    Saves are incremental.  The first save writes the population's three columns to
+    STATE_FILE, which is memory-mapped later on.  After that, each save only appends
+    the people that changed since the last save to JOURNAL_FILE, and the people who
+    died, in order, to DEATHS_FILE, which is all that's needed to rebuild the live
+    sampler exactly.  Once the journal grows as big as the columns themselves, it is
+    folded into STATE_FILE.
+
+    Everything else (counters, time step, random number generator state, per-step
+    statistics, and how far the logfile had got) goes in META_FILE, which is replaced
+    atomically as the last step of every save.  META_FILE also records how much of
+    the journal and deaths files belong to the checkpoint, so a save that gets cut
+    off part way leaves the previous checkpoint intact.
+
+    _____Attributes______
+
+    directory: String.  Where the checkpoint files live.
+
+    every: Int.  Simulation.run() saves a checkpoint after every this many time steps.
+
+    _____Methods_____
+
+    mark_infected(self, ids):
+        -- Called by the Simulation with the IDs it has just infected.
+
+    mark_resolved(self, ids):
+        -- Called by the Simulation, in order, with the IDs whose infections it has
+            just resolved.
+
+    save(self, simulation):
+        -- Writes a checkpoint of simulation.
+
+    restore(self, simulation):
+        -- Loads the last checkpoint into simulation, and rolls its logfile back to
+            where it was when the checkpoint was saved.
+    '''
+
+    def __init__(self, directory, every=1):
+        self.directory = directory
+        self.every = every
+        self._infected = []
+        self._resolved = []
+        self._has_state = False
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    def mark_infected(self, ids):
+        self._infected.extend(ids)
+
+    def mark_resolved(self, ids):
+        self._resolved.extend(ids)
+
+    def save(self, simulation):
+        population = simulation.population
+        simulation.logger.flush()
+        if not self._has_state:
+            # First save of a new run: start the directory over with full columns.
+            if os.path.exists(self._path(META_FILE)):
+                os.remove(self._path(META_FILE))
+            self._write_state(population)
+            self._has_state = True
+            journal_length = self._append(JOURNAL_FILE, 0, b'')
+            deaths_length = 0
+        else:
+            meta = self._read_meta()
+            changed = set(self._infected)
+            changed.update(self._resolved)
+            journal_length = self._append(JOURNAL_FILE, meta['journal_length'], b''.join([
+                JOURNAL_RECORD.pack(_id, population.is_vaccinated[_id],
+                                    population.is_alive[_id], population.is_infected[_id])
+                for _id in changed]))
+            deaths_length = meta['deaths_length']
+        is_alive = population.is_alive
+        deaths = array('q', [_id for _id in self._resolved if not is_alive[_id]])
+        deaths_length = self._append(DEATHS_FILE, deaths_length, deaths.tobytes())
+        self._infected = []
+        self._resolved = []
+
+        rng_state = simulation.rng.getstate()
+        self._write_meta({
+            'parameters': simulation.parameters,
+            'time_step_counter': simulation.time_step_counter,
+            'total_infected': simulation.total_infected,
+            'current_infected': simulation.current_infected,
+            'total_dead': simulation.total_dead,
+            'next_person_id': simulation.next_person_id,
+            'rng_state': [rng_state[0], list(rng_state[1]), rng_state[2]],
+            'statistics': simulation.statistics.series,
+            'logger_position': os.path.getsize(simulation.file_name),
+            'journal_length': journal_length,
+            'deaths_length': deaths_length,
+        })
+        if journal_length // JOURNAL_RECORD.size >= len(population):
+            self._compact(population)
+
+    def restore(self, simulation):
+        meta = self._read_meta()
+        if meta is None:
+            raise ValueError('no checkpoint found in {}'.format(self.directory))
+        population = simulation.population
+        size = len(population)
+        with open(self._path(STATE_FILE), 'rb') as state_file:
+            with mmap.mmap(state_file.fileno(), 0, access=mmap.ACCESS_READ) as state:
+                population.is_vaccinated[:] = state[:size]
+                population.is_alive[:] = state[size:2 * size]
+                population.is_infected[:] = state[2 * size:3 * size]
+        self._truncate(JOURNAL_FILE, meta['journal_length'])
+        with open(self._path(JOURNAL_FILE), 'rb') as journal_file:
+            journal = journal_file.read()
+        for _id, is_vaccinated, is_alive, is_infected in JOURNAL_RECORD.iter_unpack(journal):
+            population.is_vaccinated[_id] = is_vaccinated
+            population.is_alive[_id] = is_alive
+            population.is_infected[_id] = is_infected
+
+        # Replaying the deaths in order rebuilds the live sampler exactly as it was.
+        self._truncate(DEATHS_FILE, meta['deaths_length'])
+        deaths = array('q')
+        with open(self._path(DEATHS_FILE), 'rb') as deaths_file:
+            deaths.frombytes(deaths_file.read())
+        simulation.live_sampler = LiveSampler(size, simulation.rng)
+        for _id in deaths:
+            simulation.live_sampler.remove(_id)
+
+        simulation.time_step_counter = meta['time_step_counter']
+        simulation.total_infected = meta['total_infected']
+        simulation.current_infected = meta['current_infected']
+        simulation.total_dead = meta['total_dead']
+        simulation.next_person_id = meta['next_person_id']
+        version, internal_state, gauss_next = meta['rng_state']
+        simulation.rng.setstate((version, tuple(internal_state), gauss_next))
+        simulation.statistics.series = [tuple(row) for row in meta['statistics']]
+        simulation.logger.close()
+        with open(simulation.file_name, 'r+b') as log_file:
+            log_file.truncate(meta['logger_position'])
+        if hasattr(simulation.logger, 'step'):
+            simulation.logger.step = simulation.time_step_counter + 1
+        self._infected = []
+        self._resolved = []
+        self._has_state = True
+
+    def _write_state(self, population):
+        with open(self._path(STATE_FILE), 'wb') as state_file:
+            state_file.write(population.is_vaccinated)
+            state_file.write(population.is_alive)
+            state_file.write(population.is_infected)
+            state_file.flush()
+            os.fsync(state_file.fileno())
+
+    def _compact(self, population):
+        # Folds the journal into the mapped columns.  Journal records hold absolute
+        # values, so if this is interrupted, replaying the journal again on restore
+        # still gives the same result.
+        size = len(population)
+        with open(self._path(STATE_FILE), 'r+b') as state_file:
+            with mmap.mmap(state_file.fileno(), 0) as state:
+                state[:size] = population.is_vaccinated
+                state[size:2 * size] = population.is_alive
+                state[2 * size:3 * size] = population.is_infected
+                state.flush()
+        meta = self._read_meta()
+        meta['journal_length'] = 0
+        self._write_meta(meta)
+        self._truncate(JOURNAL_FILE, 0)
+
+    def _append(self, name, committed_length, data):
+        # Appends data after the committed part of the file, dropping anything a
+        # cut-off save left behind, and returns the new committed length.
+        with open(self._path(name), 'ab') as data_file:
+            data_file.truncate(committed_length)
+            data_file.write(data)
+            data_file.flush()
+            os.fsync(data_file.fileno())
+        return committed_length + len(data)
+
+    def _truncate(self, name, length):
+        with open(self._path(name), 'ab') as data_file:
+            data_file.truncate(length)
+
+    def _read_meta(self):
+        try:
+            with open(self._path(META_FILE)) as meta_file:
+                return json.load(meta_file)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self, meta):
+        temporary = self._path(META_FILE + '.tmp')
+        with open(temporary, 'w') as meta_file:
+            json.dump(meta, meta_file)
+            meta_file.flush()
+            os.fsync(meta_file.fileno())
+        os.replace(temporary, self._path(META_FILE))
@@ -0,0 +1,63 @@
+import random
+from array import array
+
+
+class LiveSampler(object):
+    '''
+    Picks random living people in O(1), no matter how much of the population has
+    died.  Keeps the IDs of everybody alive packed at the front of a dense array;
+    when somebody dies, the last living ID is swapped into their place and the
+    array shrinks by one.
+
+    _____Attributes______
+
+    living: array of Int.  The IDs of everybody still alive, in no particular order.
+
+    position: array of Int.  position[_id] is where _id sits in living, or -1 once
+        that person has died.
+
+    rng: The random number generator to draw with.  Defaults to the random module.
+
+    _____Methods_____
+
+    sample(self):
+        -- Returns the ID of a living person chosen uniformly at random.
+
+    sample_many(self, count):
+        -- Returns a list of count IDs, each drawn independently and uniformly from
+            the living.
+
+    remove(self, _id):
+        -- Call when person _id dies.  Removes them from the living in O(1).
+    '''
+
+    def __init__(self, population_size, rng=random):
+        self.rng = rng
+        typecode = 'i' if population_size < 2 ** 31 else 'q'
+        self.living = array(typecode, range(population_size))
+        self.position = array(typecode, range(population_size))
+
+    def __len__(self):
+        return len(self.living)
+
+    def __contains__(self, _id):
+        return self.position[_id] != -1
+
+    def sample(self):
+        living = self.living
+        return living[int(self.rng.random() * len(living))]
+
+    def sample_many(self, count):
+        return self.rng.choices(self.living, k=count)
+
+    def remove(self, _id):
+        living = self.living
+        position = self.position
+        slot = position[_id]
+        if slot == -1:
+            return
+        last_id = living[-1]
+        living[slot] = last_id
+        position[last_id] = slot
+        living.pop()
+        position[_id] = -1
@@ -1,3 +1,24 @@
+import atexit
+from profiler import phase
+
+# Outcome codes for interactions logged in bulk with Logger.log_interactions().
+INFECTED = 0
+VACCINATED = 1
+ALREADY_SICK = 2
+NOT_INFECTED = 3
+
+# Default number of characters a buffered Logger holds before writing them out.
+DEFAULT_BUFFER_SIZE = 1 << 22
+
+# Log line format for each outcome code, indexed by the code.
+OUTCOME_FORMATS = (
+    '{} infects {}\n',
+    "{} didn't infect {} because vaccinated\n",
+    "{} didn't infect {} because already sick\n",
+    "{} didn't infect {}\n",
+)
+
+
 class Logger(object):
     '''
     Utility class responsible for logging all interactions of note during the
@@ -8,9 +29,20 @@ class Logger(object):
 
     file_name: the name of the file that the logger will be writing to.
 
+    buffered: Bool.  By default every log method opens the logfile, appends its line
+        and closes it again.  A buffered Logger instead keeps one file handle open for
+        the whole run and collects lines in memory, writing them out when buffer_size
+        characters have piled up, at the end of every time step, and when the logger
+        is closed.  The logfile's contents are exactly the same either way.
+
+    buffer_size: Int.  How many characters a buffered Logger holds before writing.
+
+    profiler: None/Profiler object.  If set, time spent writing to the logfile is
+        added to its 'logging' phase.
+
     _____Methods_____
 
-    __init__(self, file_name):
+    __init__(self, file_name, buffered=False, buffer_size=DEFAULT_BUFFER_SIZE):
 
     write_metadata(self, pop_size, vacc_percentage, virus_name, mortality_rate,
         basic_repro_num):
@@ -27,6 +59,13 @@ class Logger(object):
             cases, "{person1.ID} didn't infect {person2.ID} because {'vaccinated' or 'already sick'}"
         - Appends the interaction to logfile.
 
+    log_interactions(self, person1_ids, person2_ids, outcomes):
+        - Expects three equal-length sequences: the IDs of the infected people, the IDs
+            of the people they interacted with, and one outcome code per interaction
+            (INFECTED, VACCINATED, ALREADY_SICK or NOT_INFECTED).
+        - Writes the same lines as calling log_interaction() once per interaction, but
+            opens the logfile only once.
+
     log_infection_survival(self, person, did_die_from_infection):
         - Expects person as Person object.
         - Expects bool for did_die_from_infection, with True denoting they died from
@@ -35,11 +74,20 @@ class Logger(object):
             "{person.ID} survived infection."
         - Appends the results of the infection to the logfile.
 
-    log_time_step(self, time_step_number):
+    log_infection_survivals(self, person_ids, died):
+        - Expects two equal-length sequences: person IDs, and for each one a bool that
+            is True if they died from their infection.
+        - Writes the same lines as calling log_infection_survival() once per person.
+
+    log_time_step(self, time_step_number, statistics=None):
         - Expects time_step_number as an Int.
         - This method should write a log telling us when one time step ends, and
             the next time step begins.  The format of this log should be:
                 "Time step {time_step_number} ended, beginning {time_step_number + 1}..."
+        - Expects statistics as a StepStatistics object, if passed.  Its latest row is
+            written on a second line as a summary of the step:
+                "Step {n} summary: {new} newly infected, {deaths} died, {total infected}
+                infected in total, {total dead} dead in total"
         - STRETCH CHALLENGE DETAILS:
             - If you choose to extend this method, the format of the summary statistics logged
                 are up to you.  At minimum, it should contain:
@@ -48,59 +96,129 @@ class Logger(object):
                     - The total number of people infected in the population, including the newly
                         infected
                     - The total number of dead, including those that died during this time step.
+
+    flush(self):
+        - Writes out everything a buffered Logger is holding.  Does nothing otherwise.
+
+    close(self):
+        - Flushes and closes the file handle of a buffered Logger.  Also called
+            automatically when the logger is used as a context manager, and when the
+            program exits.
     '''
 
-    def __init__(self, file_name):
-        # TODO:  Finish this initialization method.  The file_name passed should be the
-        # full file name of the file that the logs will be written to.
-        self.file_name = None
+    def __init__(self, file_name, buffered=False, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.file_name = file_name
+        self.buffered = buffered
+        self.buffer_size = buffer_size
+        self._file = None
+        self._buffer = []
+        self._buffer_length = 0
+        self.profiler = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
     def write_metadata(self, pop_size, vacc_percentage, virus_name, mortality_rate,
                        basic_repro_num):
-        # TODO: Finish this method.  The simulation class should use this method
-        # immediately upon creation, to log the specific parameters of the simulation
-        # as the first line of the file.  This line of metadata should be tab-delimited
-        # (each item separated by a '\t' character).
-        # NOTE: Since this is the first method called, it will create the text file
-        # that we will store all logs in.  Be sure to use 'w' mode when you open the file.
-        # For all other methods, we'll want to use the 'a' mode to append our new log to the end,
-        # since 'w' overwrites the file.
-        # NOTE: Make sure to end every line with a '/n' character to ensure that each
-        # event logged ends up on a separate line!
-        pass
+        # The first line of the logfile holds the simulation parameters, tab-delimited.
+        # 'w' mode creates (or overwrites) the logfile; every other method appends.
+        line = '{}\t{}\t{}\t{}\t{}\n'.format(
+            pop_size, vacc_percentage, virus_name, mortality_rate, basic_repro_num)
+        if self.buffered:
+            self.close()
+            self._open('w')
+            self._write(line)
+        else:
+            with open(self.file_name, 'w') as log_file:
+                log_file.write(line)
 
     def log_interaction(self, person1, person2, did_infect=None,
                         person2_vacc=None, person2_sick=None):
-        # TODO: Finish this method.  The Simulation object should use this method to
-        # log every interaction a sick individual has during each time step.  This method
-        # should accomplish this by using the information from person1 (the infected person),
-        # person2 (the person randomly chosen for the interaction), and the optional
-        # keyword arguments passed into the method.  See documentation for more info
-        # on the format of the logs that this method should write.
-        # NOTE:  You'll need to think
-        # about how the booleans passed (or not passed) represent
-        # all the possible edge cases!
-        # NOTE: Make sure to end every line with a '/n' character to ensure that each
-        # event logged ends up on a separate line!
-        pass
+        self._write(self._interaction_line(person1, person2, did_infect,
+                                           person2_vacc, person2_sick))
+
+    def log_interactions(self, person1_ids, person2_ids, outcomes):
+        formats = OUTCOME_FORMATS
+        self._write(''.join([formats[outcome].format(person1_id, person2_id)
+                             for person1_id, person2_id, outcome
+                             in zip(person1_ids, person2_ids, outcomes)]))
 
     def log_infection_survival(self, person, did_die_from_infection):
-        # TODO: Finish this method.  The Simulation object should use this method to log
-        # the results of every call of a Person object's .resolve_infection() method.
-        # If the person survives, did_die_from_infection should be False.  Otherwise,
-        # did_die_from_infection should be True.  See the documentation for more details
-        # on the format of the log.
-        # NOTE: Make sure to end every line with a '/n' character to ensure that each
-        # event logged ends up on a separate line!
-        pass
-
-    def log_time_step(self, time_step_number):
-        # TODO: Finish this method.  This method should log when a time step ends, and a
-        # new one begins.  See the documentation for more information on the format of the log.
-        # NOTE: Stretch challenge opportunity! Modify this method so that at the end of each time
-        # step, it also logs a summary of what happened in that time step, including the number of
-        # people infected, the number of people dead, etc.  You may want to create a helper class
-        # to compute these statistics for you, as a Logger's job is just to write logs!
-        # NOTE: Make sure to end every line with a '/n' character to ensure that each
-        # event logged ends up on a separate line!
-        pass
+        self._write(self._survival_line(person, did_die_from_infection))
+
+    def log_infection_survivals(self, person_ids, died):
+        self._write(''.join([
+            '{} died from infection\n'.format(_id) if did_die
+            else '{} survived infection.\n'.format(_id)
+            for _id, did_die in zip(person_ids, died)]))
+
+    def log_time_step(self, time_step_number, statistics=None):
+        line = self._time_step_line(time_step_number)
+        if statistics is not None and statistics.series:
+            line += self._summary_line(statistics.series[-1])
+        self._write(line)
+        self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        with phase(self.profiler, 'logging'):
+            if self._file is None:
+                self._open('a')
+            self._file.write(''.join(self._buffer))
+            self._file.flush()
+        self._buffer = []
+        self._buffer_length = 0
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            atexit.unregister(self.close)
+
+    def _open(self, mode):
+        self._file = open(self.file_name, mode)
+        atexit.register(self.close)
+
+    def _write(self, text):
+        if not self.buffered:
+            with phase(self.profiler, 'logging'):
+                with open(self.file_name, 'a') as log_file:
+                    log_file.write(text)
+            return
+        self._buffer.append(text)
+        self._buffer_length += len(text)
+        if self._buffer_length >= self.buffer_size:
+            self.flush()
+
+    def _interaction_line(self, person1, person2, did_infect=None,
+                          person2_vacc=None, person2_sick=None):
+        if did_infect:
+            outcome = INFECTED
+        elif person2_vacc:
+            outcome = VACCINATED
+        elif person2_sick:
+            outcome = ALREADY_SICK
+        else:
+            outcome = NOT_INFECTED
+        return OUTCOME_FORMATS[outcome].format(person1._id, person2._id)
+
+    def _survival_line(self, person, did_die_from_infection):
+        if did_die_from_infection:
+            return '{} died from infection\n'.format(person._id)
+        return '{} survived infection.\n'.format(person._id)
+
+    def _time_step_line(self, time_step_number):
+        return 'Time step {} ended, beginning {}...\n'.format(
+            time_step_number, time_step_number + 1)
+
+    def _summary_line(self, row):
+        (time_step, interactions, new_infections, vaccinated_saves, deaths, survivals,
+         current_infected, total_infected, total_dead) = row
+        return ('Step {} summary: {} newly infected, {} died, {} infected in total, '
+                '{} dead in total\n').format(time_step, new_infections, deaths,
+                                              total_infected, total_dead)
@@ -1,5 +1,4 @@
 import random
-# TODO: Import the virus clase
 
 class Person(object):
     '''
@@ -29,9 +28,10 @@ class Person(object):
             the object should create a Virus object and set it as the value for
             self.infection.  Otherwise, self.infection should be set to None.
 
-    did_survive_infection(self):
+    did_survive_infection(self, rng=random):
         - Only called if infection attribute is not None.
-        - Takes no inputs.
+        - Optionally takes the random number generator to use.  Defaults to the
+            random module.
         - Generates a random number between 0 and 1.
         - Compares random number to mortality_rate attribute stored in person's infection
             attribute.
@@ -42,16 +42,18 @@ class Person(object):
     '''
 
     def __init__(self, _id, is_vaccinated, infected=None):
-        # TODO:  Finish this method.  Follow the instructions in the class documentation
-        # to set the corret values for the following attributes.
-        self._id = None
-        self.is_vaccinated = None
-        self.is_alive = None
+        self._id = _id
+        self.is_vaccinated = is_vaccinated
+        self.is_alive = True
+        self.infected_with = infected
+
+    def did_survive_infection(self, rng=random):
+        # If person dies, set is_alive to False and return False.
+        # If person lives, set is_vaccinated = True, infected = None, return True.
+        if rng.random() < self.infected_with.mortality_rate:
+            self.is_alive = False
+            self.infected_with = None
+            return False
+        self.is_vaccinated = True
         self.infected_with = None
-
-
-    def did_survive_infection():
-        # TODO:  Finish this method. Follow the instructions in the class documentation
-        # for resolve_infection.  If person dies, set is_alive to False and return False.
-        # If person lives, set is_vaccinated = True, infected = None, return True.  
-        pass
+        return True
@@ -0,0 +1,121 @@
+import random
+from itertools import compress
+
+
+class PersonView(object):
+    '''
+    A lightweight, Person-like window onto one slot of a Population.  Reading or
+    setting an attribute reads or writes the matching column of the Population,
+    so code written against Person objects works unchanged with the array backend.
+
+    _____Attributes______
+
+    _id: Int.  The ID of the person, which is also their slot in the Population.
+
+    is_vaccinated, is_alive: Bool.  Backed by the Population's columns.
+
+    infected_with: None/Virus object.  The Population's virus if this person is
+        infected, otherwise None.
+    '''
+
+    __slots__ = ('_population', '_id')
+
+    def __init__(self, population, _id):
+        self._population = population
+        self._id = _id
+
+    @property
+    def is_vaccinated(self):
+        return self._population.is_vaccinated[self._id] == 1
+
+    @is_vaccinated.setter
+    def is_vaccinated(self, value):
+        self._population.is_vaccinated[self._id] = 1 if value else 0
+
+    @property
+    def is_alive(self):
+        return self._population.is_alive[self._id] == 1
+
+    @is_alive.setter
+    def is_alive(self, value):
+        self._population.is_alive[self._id] = 1 if value else 0
+
+    @property
+    def infected_with(self):
+        if self._population.is_infected[self._id]:
+            return self._population.virus
+        return None
+
+    @infected_with.setter
+    def infected_with(self, virus):
+        self._population.is_infected[self._id] = 0 if virus is None else 1
+
+    def did_survive_infection(self, rng=random):
+        return self._population.resolve_infection(self._id, rng)
+
+
+class Population(object):
+    '''
+    Array-backed (struct-of-arrays) population.  Instead of one Person object per
+    person, every attribute is stored as a column with one byte per person, indexed
+    by person ID.  This keeps the memory cost at a few bytes per person, and lets
+    whole-population scans (counting the living, finding the infected) run at C
+    speed over the columns.
+
+    Supports len(), indexing and iteration, which hand out PersonView objects, so
+    random.choice(population) and other Person-based code keep working.
+
+    _____Attributes______
+
+    virus: Virus object.  The virus every infected person is infected with.
+
+    is_vaccinated: bytearray.  1 if the person is vaccinated (or immune), else 0.
+
+    is_alive: bytearray.  1 if the person is alive, else 0.
+
+    is_infected: bytearray.  1 if the person is currently infected, else 0.
+
+    _____Methods_____
+
+    resolve_infection(self, _id, rng=random):
+        -- Same rules as Person.did_survive_infection(), applied to the person
+            in slot _id.  Returns True if they survived.
+
+    infected_ids(self):
+        -- Returns a list of the IDs of everybody currently infected.
+    '''
+
+    def __init__(self, size, virus):
+        self.virus = virus
+        self.is_vaccinated = bytearray(size)
+        self.is_alive = bytearray(b'\x01') * size
+        self.is_infected = bytearray(size)
+
+    def __len__(self):
+        return len(self.is_alive)
+
+    def __getitem__(self, _id):
+        if not 0 <= _id < len(self.is_alive):
+            raise IndexError('population index out of range')
+        return PersonView(self, _id)
+
+    def __iter__(self):
+        for _id in range(len(self.is_alive)):
+            yield PersonView(self, _id)
+
+    def resolve_infection(self, _id, rng=random):
+        self.is_infected[_id] = 0
+        if rng.random() < self.virus.mortality_rate:
+            self.is_alive[_id] = 0
+            return False
+        self.is_vaccinated[_id] = 1
+        return True
+
+    def infected_ids(self):
+        return list(compress(range(len(self.is_infected)), self.is_infected))
+
+    def alive_count(self):
+        return self.is_alive.count(1)
+
+    def infected_count(self):
+        return self.is_infected.count(1)
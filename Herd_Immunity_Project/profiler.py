@@ -0,0 +1,60 @@
+from contextlib import nullcontext
+from time import perf_counter
+
+# What phase() hands out when profiling is off: a shared context manager
+# that does nothing, so disabled profiling costs no timer calls at all.
+NO_PHASE = nullcontext()
+
+
+def phase(profiler, name):
+    '''
+    Returns profiler.phase(name), or NO_PHASE if profiler is None.  Used as
+    `with phase(self.profiler, 'interactions'):` around each phase.
+    '''
+    return NO_PHASE if profiler is None else profiler.phase(name)
+
+
+class Profiler(object):
+    '''
+    Adds up the wall time spent in each phase of a simulation.  Pass one to
+    Simulation(profiler=...) to time population creation, interactions, applying
+    new infections and resolving infections, plus time spent writing logs.  Logging
+    happens inside the other phases, so its time is also counted in theirs.
+
+    _____Attributes______
+
+    totals: {String: Float}.  Seconds spent in each phase.
+
+    calls: {String: Int}.  How many times each phase was entered.
+
+    _____Methods_____
+
+    phase(self, name):
+        -- Returns a context manager that adds the time spent inside it to phase name.
+    '''
+
+    def __init__(self):
+        self.totals = {}
+        self.calls = {}
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def add(self, name, seconds):
+        self.totals[name] = self.totals.get(name, 0.0) + seconds
+        self.calls[name] = self.calls.get(name, 0) + 1
+
+
+class _Phase(object):
+    __slots__ = ('profiler', 'name', 'started')
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.started = perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.profiler.add(self.name, perf_counter() - self.started)
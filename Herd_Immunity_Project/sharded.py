@@ -0,0 +1,352 @@
+'''
+Runs a single, very large herd immunity simulation across several worker processes.
+
+The population is stored the same way as the 'arrays' backend (one byte per person
+per column, see population.py), but in shared memory, and split into contiguous
+shards of person IDs, one per worker process.  Every time step has two phases,
+with a barrier between them so the end-of-step rules from the README still hold:
+
+    1. Interactions.  Each worker gives the infected people in its shard their 100
+        interactions with random living people from the whole population.  Nobody
+        changes state during this phase, so every worker reads the same snapshot.
+        Workers report the IDs they infected.
+    2. State changes.  The main process merges the newly infected IDs, and hands each
+        worker the ones in its shard.  Each worker infects those people, then
+        resolves the infections of everybody in its shard that started the step
+        infected, and reports who died.
+
+Only the worker that owns a shard ever writes to it.  The main process owns the
+array of living IDs that partners are drawn from (see live_sampler.py).
+
+Each worker logs the interactions and infection survivals of its shard to its own
+logfile, named after the main logfile with '.shard{k}' added before the extension.
+The main logfile holds the metadata and the time step summaries.  Run it like this:
+
+    python3 sharded.py {population size} {vacc_percentage} {virus_name} {mortality_rate}
+        {basic_repro_num} {optional: initial_infected} [--shards=N] [--seed=S]
+'''
+import os
+import random
+import sys
+from array import array
+from itertools import compress
+from multiprocessing import Pipe, Process
+from multiprocessing.shared_memory import SharedMemory
+from logger import Logger, VACCINATED
+from simulation import (BLOCK_SIZE, INTERACTIONS_PER_STEP, interaction_outcomes, parse_args,
+                        repeat_each, resolve_infections)
+from step_statistics import StepStatistics
+
+# How often (in seconds) the main process checks that a worker it's waiting on is
+# still running.
+POLL_SECONDS = 1.0
+# How long close() waits for each worker to exit before terminating it.
+JOIN_SECONDS = 10.0
+
+
+class ShardedSimulation(object):
+    '''
+    A Simulation whose population is split across worker processes.  Follows the
+    same rules as Simulation with the 'arrays' backend and batched time steps.
+
+    _____Attributes______
+
+    population_size, vacc_percentage, virus_name, mortality_rate, basic_repro_num,
+    total_infected, current_infected, total_dead, statistics, logger, file_name:
+        Same as Simulation.
+
+    shards: Int.  The number of worker processes.  Defaults to the number of CPUs.
+
+    shard_size: Int.  How many consecutive person IDs each shard owns.  Shard k owns
+        IDs k * shard_size up to (k + 1) * shard_size.
+
+    seed: Int.  Seeds the population, and the random number generator of each shard.
+
+    _____Methods_____
+
+    run(self):
+        -- Same as Simulation.run().  Shuts down the workers and frees the shared
+            memory when it finishes, or when it fails.  Raises RuntimeError if a
+            worker process dies part way through.
+
+    time_step(self):
+        -- Runs the two phases of one time step described above.
+
+    close(self):
+        -- Shuts down the workers and frees the shared memory.
+    '''
+
+    def __init__(self, population_size, vacc_percentage, virus_name, mortality_rate,
+                 basic_repro_num, initial_infected=1, shards=None, seed=42, file_name=None):
+        self.population_size = population_size
+        self.vacc_percentage = vacc_percentage
+        self.virus_name = virus_name
+        self.mortality_rate = mortality_rate
+        self.basic_repro_num = basic_repro_num
+        self.shards = shards or os.cpu_count()
+        self.shard_size = -(-population_size // self.shards)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.total_dead = 0
+        self.statistics = StepStatistics()
+        if file_name is None:
+            file_name = "{}_simulation_pop_{}_vp_{}_infected_{}.txt".format(
+                virus_name, population_size, vacc_percentage, initial_infected)
+        self.file_name = file_name
+        self.logger = Logger(file_name, buffered=True)
+        self.logger.write_metadata(population_size, vacc_percentage, virus_name,
+                                   mortality_rate, basic_repro_num)
+
+        # The columns live side by side in one block: vaccinated, alive, infected.
+        self._state = SharedMemory(create=True, size=max(3 * population_size, 1))
+        self._live = None
+        self._workers = []
+        self._connections = []
+        try:
+            self._typecode = 'i' if population_size < 2 ** 31 else 'q'
+            itemsize = array(self._typecode).itemsize
+            self._live = SharedMemory(create=True, size=max(itemsize * population_size, 1))
+            self._create_population(initial_infected)
+            self._start_workers()
+        except BaseException:
+            # Shared memory outlives the process unless it's unlinked, so give it
+            # back, along with any workers already started, before passing the
+            # error on.
+            for worker, connection in zip(self._workers, self._connections):
+                worker.terminate()
+                worker.join()
+                connection.close()
+            self._workers = []
+            self._connections = []
+            self.logger.close()
+            if hasattr(self, 'living'):
+                self.living.release()
+            for memory in (self._live, self._state):
+                if memory is not None:
+                    memory.close()
+                    memory.unlink()
+            raise
+
+    def _create_population(self, initial_infected):
+        size = self.population_size
+        infected_count = min(initial_infected, size)
+        state = self._state.buf
+        state[:size] = bytes(infected_count) + bytes(
+            self.rng.random() < self.vacc_percentage for _ in range(size - infected_count))
+        state[size:2 * size] = b'\x01' * size
+        state[2 * size:3 * size] = b'\x01' * infected_count + bytes(size - infected_count)
+        self.living = self._live.buf.cast(self._typecode)
+        self.living[:size] = array(self._typecode, range(size))
+        # Where each person sits in self.living, or -1 once they have died.
+        self.position = array(self._typecode, range(size))
+        self.live_count = size
+        self.total_infected = infected_count
+        self.current_infected = infected_count
+
+    def _start_workers(self):
+        base, extension = os.path.splitext(self.file_name)
+        for shard in range(self.shards):
+            start = min(shard * self.shard_size, self.population_size)
+            end = min(start + self.shard_size, self.population_size)
+            parent_connection, child_connection = Pipe()
+            worker = Process(target=_shard_worker, daemon=True, args=(
+                child_connection, self._state.name, self._live.name, self._typecode,
+                self.population_size, start, end, self.rng.getrandbits(64),
+                self.basic_repro_num, self.mortality_rate,
+                '{}.shard{}{}'.format(base, shard, extension)))
+            worker.start()
+            child_connection.close()
+            self._workers.append(worker)
+            self._connections.append(parent_connection)
+
+    def _simulation_should_continue(self):
+        if self.total_dead == self.population_size:
+            return False
+        return self.current_infected > 0
+
+    def run(self):
+        time_step_counter = 0
+        try:
+            should_continue = self._simulation_should_continue()
+            while should_continue:
+                self.time_step()
+                time_step_counter += 1
+                self.statistics.end_step(time_step_counter, self.current_infected,
+                                         self.total_infected, self.total_dead)
+                for shard in range(self.shards):
+                    self._send(shard, ('end_step', time_step_counter))
+                for shard in range(self.shards):
+                    self._receive(shard)
+                self.logger.log_time_step(time_step_counter, self.statistics)
+                should_continue = self._simulation_should_continue()
+        finally:
+            self.close()
+        print('The simulation has ended after {} turns.'.format(time_step_counter))
+        return time_step_counter
+
+    def time_step(self):
+        # Phase 1: every shard runs its interactions against the same snapshot.
+        for shard in range(self.shards):
+            self._send(shard, ('interact', self.live_count))
+        newly_infected = set()
+        for shard in range(self.shards):
+            infected_ids, interactions, vaccinated_saves = self._receive(shard)
+            newly_infected.update(infected_ids)
+            self.statistics.interactions += interactions
+            self.statistics.vaccinated_saves += vaccinated_saves
+
+        # Barrier: every shard has finished interacting.  Phase 2: each shard applies
+        # the new infections it owns, then resolves the people who started infected.
+        by_shard = [[] for _ in range(self.shards)]
+        for _id in newly_infected:
+            by_shard[_id // self.shard_size].append(_id)
+        for shard, infected_ids in enumerate(by_shard):
+            self._send(shard, ('resolve', infected_ids))
+        resolved = 0
+        for shard in range(self.shards):
+            died_ids, survivals = self._receive(shard)
+            for _id in died_ids:
+                self._remove_living(_id)
+            self.statistics.deaths += len(died_ids)
+            self.statistics.survivals += survivals
+            self.total_dead += len(died_ids)
+            resolved += len(died_ids) + survivals
+        self.total_infected += len(newly_infected)
+        self.current_infected += len(newly_infected) - resolved
+        self.statistics.record_infections(len(newly_infected))
+
+    def _worker_died(self, shard):
+        return RuntimeError('the worker for shard {} exited with code {}'.format(
+            shard, self._workers[shard].exitcode))
+
+    def _send(self, shard, message):
+        try:
+            self._connections[shard].send(message)
+        except OSError:
+            raise self._worker_died(shard)
+
+    def _receive(self, shard):
+        # Waits for a shard's reply, but gives up if its worker has died, rather
+        # than waiting forever for a reply that will never come.
+        connection, worker = self._connections[shard], self._workers[shard]
+        while not connection.poll(POLL_SECONDS):
+            if not worker.is_alive():
+                break
+        try:
+            return connection.recv()
+        except (EOFError, OSError):
+            raise self._worker_died(shard)
+
+    def _remove_living(self, _id):
+        # Same swap-remove as LiveSampler.remove(), on the shared array.
+        slot = self.position[_id]
+        last_id = self.living[self.live_count - 1]
+        self.living[slot] = last_id
+        self.position[last_id] = slot
+        self.position[_id] = -1
+        self.live_count -= 1
+
+    def close(self):
+        if not self._workers:
+            return
+        try:
+            for connection in self._connections:
+                try:
+                    connection.send(('close', None))
+                except OSError:
+                    # The worker is already gone; joining it below is all that's left.
+                    pass
+            for worker, connection in zip(self._workers, self._connections):
+                worker.join(JOIN_SECONDS)
+                if worker.is_alive():
+                    worker.terminate()
+                    worker.join()
+                connection.close()
+        finally:
+            self._workers = []
+            self._connections = []
+            self.logger.close()
+            self.living.release()
+            self._live.close()
+            self._live.unlink()
+            self._state.close()
+            self._state.unlink()
+
+
+def _shard_worker(connection, state_name, live_name, typecode, population_size,
+                  start, end, seed, basic_repro_num, mortality_rate, file_name):
+    # Runs in a worker process.  Owns the IDs from start up to end, and waits for
+    # commands from the ShardedSimulation.  Like Simulation._batched_time_step(), it
+    # works through its infected people BLOCK_SIZE at a time, logging each block
+    # before moving on, so its memory use doesn't grow with the size of the outbreak.
+    state_memory = SharedMemory(name=state_name)
+    live_memory = SharedMemory(name=live_name)
+    state = state_memory.buf
+    is_vaccinated = state[:population_size]
+    is_alive = state[population_size:2 * population_size]
+    is_infected = state[2 * population_size:3 * population_size]
+    living = live_memory.buf.cast(typecode)
+    rng = random.Random(seed)
+    # Shard logs have no metadata line, so start each one empty by hand.
+    open(file_name, 'w').close()
+    logger = Logger(file_name, buffered=True)
+    started_infected = array('q')
+    while True:
+        command, argument = connection.recv()
+        if command == 'interact':
+            partners = living[:argument]
+            started_infected = array('q', compress(range(start, end), is_infected[start:end]))
+            infected_ids = set()
+            interactions = vaccinated_saves = 0
+            for block_start in range(0, len(started_infected), BLOCK_SIZE):
+                block = started_infected[block_start:block_start + BLOCK_SIZE]
+                person2_ids = rng.choices(partners, k=len(block) * INTERACTIONS_PER_STEP)
+                outcomes, block_infected = interaction_outcomes(
+                    person2_ids, is_vaccinated, is_infected, basic_repro_num, rng)
+                logger.log_interactions(repeat_each(block, INTERACTIONS_PER_STEP),
+                                        person2_ids, outcomes)
+                infected_ids.update(block_infected)
+                interactions += len(outcomes)
+                vaccinated_saves += outcomes.count(VACCINATED)
+            partners.release()
+            connection.send((list(infected_ids), interactions, vaccinated_saves))
+        elif command == 'resolve':
+            for _id in argument:
+                is_infected[_id] = 1
+            died_ids = []
+            for block_start in range(0, len(started_infected), BLOCK_SIZE):
+                block = started_infected[block_start:block_start + BLOCK_SIZE]
+                died = resolve_infections(block, is_vaccinated, is_alive, is_infected,
+                                          mortality_rate, rng)
+                logger.log_infection_survivals(block, died)
+                died_ids.extend(compress(block, died))
+            connection.send((died_ids, len(started_infected) - len(died_ids)))
+        elif command == 'end_step':
+            logger.log_time_step(argument)
+            connection.send(None)
+        else:
+            break
+    logger.close()
+    for view in (is_vaccinated, is_alive, is_infected, living, state):
+        view.release()
+    state_memory.close()
+    live_memory.close()
+    connection.close()
+
+
+if __name__ == "__main__":
+    params, options = parse_args(sys.argv[1:])
+    pop_size = int(params[0])
+    vacc_percentage = float(params[1])
+    virus_name = str(params[2])
+    mortality_rate = float(params[3])
+    basic_repro_num = float(params[4])
+    if len(params) == 6:
+        initial_infected = int(params[5])
+    else:
+        initial_infected = 1
+    simulation = ShardedSimulation(pop_size, vacc_percentage, virus_name, mortality_rate,
+                                   basic_repro_num, initial_infected,
+                                   shards=int(options['shards']) if 'shards' in options else None,
+                                   seed=int(options.get('seed', 42)))
+    simulation.run()
@@ -1,7 +1,39 @@
 import random, sys
 random.seed(42)
+from array import array
+from itertools import chain, compress, repeat
+from operator import itemgetter
 from person import Person
-from logger import Logger
+from binary_logger import BinaryLogger
+from checkpoint import Checkpoint, load_parameters
+from logger import Logger, INFECTED, VACCINATED, ALREADY_SICK, NOT_INFECTED
+from population import Population
+from profiler import phase
+from live_sampler import LiveSampler
+from step_statistics import StepStatistics
+from virus import Virus
+
+BACKENDS = ('objects', 'arrays')
+LOG_FORMATS = ('text', 'binary')
+
+# Number of interactions every infected person has during a time step.
+INTERACTIONS_PER_STEP = 100
+
+# How many infected people a batched time step works through at a time.  Each block
+# holds INTERACTIONS_PER_STEP pairs per person, so a time step's memory use stays the
+# same however large the outbreak gets.
+BLOCK_SIZE = 1000
+
+# Maps 2 * is_vaccinated + is_infected of an interaction partner to its outcome code,
+# before any infections are drawn (see interaction_outcomes()).
+_PARTNER_OUTCOMES = bytes((NOT_INFECTED, ALREADY_SICK, VACCINATED, VACCINATED)) + bytes(252)
+# Maps the same value to 1 if the partner can be infected, else 0.
+_SUSCEPTIBLE = b'\x01' + bytes(255)
+
+# Random bytes drawn per trial by bernoulli_mask(), which decides how finely
+# probabilities are resolved: to within 256 ** -3, about 6e-8.
+PROBABILITY_BYTES = 3
+
 
 class Simulation(object):
     '''
@@ -15,16 +47,50 @@ class Simulation(object):
     _____Attributes______
 
     logger: Logger object.  The helper object that will be responsible for writing
-    all logs to the simulation.
+    all logs to the simulation.  Passing buffered_log=True makes it a buffered
+    Logger, which keeps the logfile open for the whole run instead of reopening it
+    for every line.  Passing log_format='binary' uses a BinaryLogger instead, which
+    writes fixed-width event records to a .bin file (see binary_logger.py).
 
     population_size: Int.  The size of the population for this simulation.
 
-    population: [Person].  A list of person objects representing all people in
-        the population.
+    backend: String.  Either 'objects' or 'arrays'.  Decides how the population is
+        stored.  See population.py for the array-backed implementation.
+
+    population: [Person] or Population.  All people in the population.  With the
+        'objects' backend this is a list of Person objects; with the 'arrays' backend
+        it is a Population, which stores one byte per person per attribute and hands
+        out Person-like views when indexed.
+
+    batched: Bool.  If True, time_step() computes interactions a block of infected
+        people at a time over the population's columns (see _batched_time_step())
+        instead of calling interaction() once per pair.  Requires the 'arrays' backend.
+        This is still pure Python (there is no NumPy here): each pair still costs a
+        sampled partner and a log record.  At 200,000 people a step costs about 0.6
+        microseconds per interaction with the binary log and 1.3 with the text log,
+        about 6 and 3 times faster than the objects backend, so a step with millions
+        of interactions still takes seconds.  Memory use stays under about 50 MB
+        however many interactions a step has, since it works BLOCK_SIZE infected
+        people at a time.
 
     next_person_id: Int.  The next available id value for all created person objects.
         Each person should have a unique _id value.
 
+    id_index: {Int: Int}.  Maps each person's _id to their slot in self.population, so
+        a person can be found by ID without scanning the population.  Only built for
+        the 'objects' backend; with the 'arrays' backend a person's ID is their slot.
+
+    live_sampler: LiveSampler.  Tracks who is still alive, so a random living person
+        can be picked in O(1) without redrawing dead people.
+
+    newly_infected: {Int}.  The IDs of everybody infected during the current time step.
+        A set, so somebody infected by several sick people is only recorded once.
+
+    rng: The random number generator for this simulation.  By default this is the
+        random module itself, seeded with 42 above.  Passing seed gives the simulation
+        its own random.Random(seed) instead, so several simulations can run side by
+        side (see sweep.py) without sharing one stream of random numbers.
+
     virus_name: String.  The name of the virus for the simulation.  This will be passed
     to the Virus object upon instantiation.
 
@@ -46,12 +112,44 @@ class Simulation(object):
     total_dead: Int.  The number of people that have died as a result of the infection
         during this simulation.  Starts at zero.
 
+    time_step_counter: Int.  The number of time steps run so far.
+
+    checkpoint: None/Checkpoint object.  If checkpoint_dir is passed, run() saves the
+        whole state of the simulation there every checkpoint_every time steps, and
+        passing resume=True as well picks the simulation up from the last checkpoint
+        instead of creating a new population.  See checkpoint.py.  Requires the
+        'arrays' backend.
+
+    profiler: None/Profiler object.  If passed, the wall time of each phase of the
+        simulation (creating the population, interactions, applying new infections,
+        resolving infections, and writing logs) is added up in it.  See profiler.py
+        and benchmark.py.
+
+    parameters: Dict.  The keyword arguments this simulation was created with, which
+        the checkpoint keeps so the simulation can be recreated to resume it.
+
+    statistics: StepStatistics object.  Counts what happens during each time step as
+        it happens, and keeps a per-step time series that the logger summarizes at the
+        end of every step.  Pass stats_file to also write the series out as CSV when
+        the simulation ends.
+
 
     _____Methods_____
 
     __init__(population_size, vacc_percentage, virus_name, mortality_rate,
-     basic_repro_num, initial_infected=1):
+     basic_repro_num, initial_infected=1, backend='objects', batched=False,
+     buffered_log=False, log_format='text', stats_file=None, seed=None,
+     file_name=None, checkpoint_dir=None, checkpoint_every=1, resume=False,
+     profiler=None):
         -- All arguments will be passed as command-line arguments when the file is run.
+        -- backend can be passed on the command line as --backend=arrays, batched
+            as --batched, buffered_log as --buffered-log, log_format as
+            --log-format=binary and stats_file as --stats-file=steps.csv.
+        -- seed can be passed on the command line as --seed=N.
+        -- file_name overrides the default name of the logfile.
+        -- checkpoint_dir and checkpoint_every can be passed on the command line as
+            --checkpoint=DIR and --checkpoint-every=N.  Run with --resume=DIR (and no
+            other arguments) to resume from the checkpoint in DIR.
         -- After setting values for attributes, calls self._create_population() in order
             to create the population array that will be used for this simulation.
 
@@ -70,137 +168,360 @@ class Simulation(object):
     '''
 
     def __init__(self, population_size, vacc_percentage, virus_name,
-                 mortality_rate, basic_repro_num, initial_infected=1):
+                 mortality_rate, basic_repro_num, initial_infected=1, backend='objects',
+                 batched=False, buffered_log=False, log_format='text', stats_file=None,
+                 seed=None, file_name=None, checkpoint_dir=None, checkpoint_every=1,
+                 resume=False, profiler=None):
+        if backend not in BACKENDS:
+            raise ValueError('backend must be one of {}, not {!r}'.format(BACKENDS, backend))
+        if batched and backend != 'arrays':
+            raise ValueError("batched time steps require the 'arrays' backend")
+        if log_format not in LOG_FORMATS:
+            raise ValueError('log_format must be one of {}, not {!r}'.format(
+                LOG_FORMATS, log_format))
+        if checkpoint_dir is not None and backend != 'arrays':
+            raise ValueError("checkpoints require the 'arrays' backend")
+        if resume and checkpoint_dir is None:
+            raise ValueError('resume requires a checkpoint_dir')
         self.population_size = population_size
         self.population = []
+        self.backend = backend
+        self.batched = batched
+        self.seed = seed
+        self.rng = random if seed is None else random.Random(seed)
         self.total_infected = 0
         self.current_infected = 0
+        self.total_dead = 0
+        self.time_step_counter = 0
+        self.profiler = profiler
+        self.statistics = StepStatistics()
+        self.stats_file = stats_file
         self.next_person_id = 0
+        self.vacc_percentage = vacc_percentage
         self.virus_name = virus_name
         self.mortality_rate = mortality_rate
         self.basic_repro_num = basic_repro_num
-        self.file_name = "{}_simulation_pop_{}_vp_{}_infected_{}.txt".format(
-            virus_name, population_size, vacc_percentage, initial_infected)
+        self.virus = Virus(virus_name, mortality_rate, basic_repro_num)
+        if file_name is None:
+            file_name = "{}_simulation_pop_{}_vp_{}_infected_{}.txt".format(
+                virus_name, population_size, vacc_percentage, initial_infected)
+        self.file_name = file_name
+        self.parameters = {
+            'population_size': population_size, 'vacc_percentage': vacc_percentage,
+            'virus_name': virus_name, 'mortality_rate': mortality_rate,
+            'basic_repro_num': basic_repro_num, 'initial_infected': initial_infected,
+            'backend': backend, 'batched': batched, 'buffered_log': buffered_log,
+            'log_format': log_format, 'stats_file': stats_file, 'seed': seed,
+            'file_name': file_name, 'checkpoint_every': checkpoint_every,
+        }
+        self.checkpoint = None
+        if checkpoint_dir is not None:
+            self.checkpoint = Checkpoint(checkpoint_dir, checkpoint_every)
 
-        # TODO: Create a Logger object and bind it to self.logger.  You should use this
-        # logger object to log all events of any importance during the simulation.  Don't forget
-        # to call these logger methods in the corresponding parts of the simulation!
-        self.logger = None
+        if log_format == 'binary':
+            if self.file_name.endswith('.txt'):
+                self.file_name = self.file_name[:-len('.txt')] + '.bin'
+            self.logger = BinaryLogger(self.file_name)
+        else:
+            self.logger = Logger(self.file_name, buffered=buffered_log)
+        self.logger.profiler = profiler
+        if not resume:
+            self.logger.write_metadata(population_size, vacc_percentage, virus_name,
+                                       mortality_rate, basic_repro_num)
 
         # This attribute will be used to keep track of all the people that catch
         # the infection during a given time step. We'll store each newly infected
         # person's .ID attribute in here.  At the end of each time step, we'll call
         # self._infect_newly_infected() and then reset .newly_infected back to an empty
-        # list.
-        self.newly_infected = []
-        # TODO: Call self._create_population() and pass in the correct parameters.
-        # Store the array that this method will return in the self.population attribute.
+        # set.
+        self.newly_infected = set()
+        self.id_index = {}
+        if resume:
+            self.population = Population(population_size, self.virus)
+            self.checkpoint.restore(self)
+        else:
+            with phase(self.profiler, 'create_population'):
+                self.population = self._create_population(initial_infected)
+                self.live_sampler = LiveSampler(self.population_size, self.rng)
 
     def _create_population(self, initial_infected):
-        # TODO: Finish this method!  This method should be called when the simulation
-        # begins, to create the population that will be used. This method should return
-        # an array filled with Person objects that matches the specifications of the
-        # simulation (correct number of people in the population, correct percentage of
-        # people vaccinated, correct number of initially infected people).
+        if self.backend == 'arrays':
+            return self._create_array_population(initial_infected)
         population = []
         infected_count = 0
-        while len(population) != pop_size:
-            if infected_count !=  initial_infected:
-                # TODO: Create all the infected people first, and then worry about the rest.
-                # Don't forget to increment infected_count every time you create a
-                # new infected person!
-                pass
+        while len(population) != self.population_size:
+            if infected_count != initial_infected:
+                # Create all the infected people first.
+                population.append(Person(self.next_person_id, False, self.virus))
+                infected_count += 1
             else:
                 # Now create all the rest of the people.
-                # Every time a new person will be created, generate a random number between
-                # 0 and 1.  If this number is smaller than vacc_percentage, this person
-                # should be created as a vaccinated person. If not, the person should be
-                # created as an unvaccinated person.
-                pass
-            # TODO: After any Person object is created, whether sick or healthy,
-            # you will need to increment self.next_person_id by 1. Each Person object's
-            # ID has to be unique!
+                is_vaccinated = self.rng.random() < self.vacc_percentage
+                population.append(Person(self.next_person_id, is_vaccinated))
+            self.next_person_id += 1
+        self.id_index = {person._id: slot for slot, person in enumerate(population)}
+        self.total_infected = infected_count
+        self.current_infected = infected_count
+        return population
+
+    def _create_array_population(self, initial_infected):
+        # Same rules as _create_population(), but fills whole columns at once instead
+        # of building one Person object per person.  Person IDs are slot numbers.
+        population = Population(self.population_size, self.virus)
+        infected_count = min(initial_infected, self.population_size)
+        population.is_infected[:infected_count] = b'\x01' * infected_count
+        population.is_vaccinated[infected_count:] = bytes(
+            self.rng.random() < self.vacc_percentage
+            for _ in range(self.population_size - infected_count))
+        self.next_person_id = self.population_size
+        self.total_infected = infected_count
+        self.current_infected = infected_count
         return population
 
     def _simulation_should_continue(self):
-        # TODO: Complete this method!  This method should return True if the simulation
-        # should continue, or False if it should not.  The simulation should end under
-        # any of the following circumstances:
-        #     - The entire population is dead.
-        #     - There are no infected people left in the population.
-        # In all other instances, the simulation should continue.
-        pass
+        # The simulation ends when everybody is dead, or when nobody is infected.
+        if self.total_dead == self.population_size:
+            return False
+        return self.current_infected > 0
 
     def run(self):
-        # TODO: Finish this method.  This method should run the simulation until
-        # everyone in the simulation is dead, or the disease no longer exists in the
-        # population. To simplify the logic here, we will use the helper method
-        # _simulation_should_continue() to tell us whether or not we should continue
-        # the simulation and run at least 1 more time_step.
-
-        # This method should keep track of the number of time steps that
-        # have passed using the time_step_counter variable.  Make sure you remember to
-        # the logger's log_time_step() method at the end of each time step, pass in the
-        # time_step_counter variable!
-        time_step_counter = 0
-        # TODO: Remember to set this variable to an intial call of
-        # self._simulation_should_continue()!
-        should_continue = None
+        should_continue = self._simulation_should_continue()
         while should_continue:
-        # TODO: for every iteration of this loop, call self.time_step() to compute another
-        # round of this simulation.  At the end of each iteration of this loop, remember
-        # to rebind should_continue to another call of self._simulation_should_continue()!
-            pass
-        print('The simulation has ended after {time_step_counter} turns.'.format(time_step_counter))
+            self.time_step()
+            self.time_step_counter += 1
+            self.statistics.end_step(self.time_step_counter, self.current_infected,
+                                     self.total_infected, self.total_dead)
+            self.logger.log_time_step(self.time_step_counter, self.statistics)
+            should_continue = self._simulation_should_continue()
+            if (self.checkpoint is not None
+                    and self.time_step_counter % self.checkpoint.every == 0):
+                self.checkpoint.save(self)
+        self.logger.close()
+        if self.stats_file is not None:
+            self.statistics.to_csv(self.stats_file)
+        print('The simulation has ended after {} turns.'.format(self.time_step_counter))
+        return self.time_step_counter
+
+    def _infected_people(self):
+        if self.backend == 'arrays':
+            return [self.population[_id] for _id in self.population.infected_ids()]
+        return [person for person in self.population
+                if person.is_alive and person.infected_with is not None]
 
     def time_step(self):
-        # TODO: Finish this method!  This method should contain all the basic logic
-        # for computing one time step in the simulation.  This includes:
-            # - For each infected person in the population:
-            #        - Repeat for 100 total interactions:
-            #             - Grab a random person from the population.
-            #           - If the person is dead, continue and grab another new
-            #                 person from the population. Since we don't interact
-            #                 with dead people, this does not count as an interaction.
-            #           - Else:
-            #               - Call simulation.interaction(person, random_person)
-            #               - Increment interaction counter by 1.
-            pass
+        if self.batched:
+            return self._batched_time_step()
+        # Everybody who is infected at the start of the step gets 100 interactions
+        # with living people.  Partners are drawn from the live sampler, so dead
+        # people are never picked and no draws are wasted on them.
+        with phase(self.profiler, 'interactions'):
+            infected_people = self._infected_people()
+            for person in infected_people:
+                for _ in range(INTERACTIONS_PER_STEP):
+                    random_person = self._person_by_id(self.live_sampler.sample())
+                    self.interaction(person, random_person)
+
+        # All state changes happen at the end of the step: first the new infections,
+        # then everybody who started the step infected either dies or recovers.
+        with phase(self.profiler, 'infect_newly_infected'):
+            self._infect_newly_infected()
+        with phase(self.profiler, 'resolve_infections'):
+            for person in infected_people:
+                did_survive = person.did_survive_infection(self.rng)
+                self.statistics.record_resolution(did_survive)
+                if not did_survive:
+                    self.total_dead += 1
+                    self.live_sampler.remove(person._id)
+                self.logger.log_infection_survival(person, not did_survive)
+        self.current_infected -= len(infected_people)
+        if self.checkpoint is not None:
+            self.checkpoint.mark_resolved([person._id for person in infected_people])
+
+    def _batched_time_step(self):
+        # Same rules as time_step(), but the infected are worked through BLOCK_SIZE
+        # people at a time: partners for a whole block are drawn at once, outcomes are
+        # looked up over the population's columns (see interaction_outcomes()), and
+        # the block is logged before moving on to the next one.  Resolving infections
+        # is done in the same blocks once every interaction has happened.
+        population = self.population
+        infected_ids = array('q', compress(range(len(population)), population.is_infected))
+        with phase(self.profiler, 'interactions'):
+            for start in range(0, len(infected_ids), BLOCK_SIZE):
+                block = infected_ids[start:start + BLOCK_SIZE]
+                person2_ids = self.live_sampler.sample_many(len(block) * INTERACTIONS_PER_STEP)
+                outcomes, newly_infected = interaction_outcomes(
+                    person2_ids, population.is_vaccinated, population.is_infected,
+                    self.basic_repro_num, self.rng)
+                self.newly_infected.update(newly_infected)
+                self.logger.log_interactions(repeat_each(block, INTERACTIONS_PER_STEP),
+                                             person2_ids, outcomes)
+                self.statistics.record_interactions(outcomes)
+
+        with phase(self.profiler, 'infect_newly_infected'):
+            self._infect_newly_infected()
+        with phase(self.profiler, 'resolve_infections'):
+            for start in range(0, len(infected_ids), BLOCK_SIZE):
+                block = infected_ids[start:start + BLOCK_SIZE]
+                died = resolve_infections(block, population.is_vaccinated, population.is_alive,
+                                          population.is_infected, self.mortality_rate, self.rng)
+                for _id in compress(block, died):
+                    self.live_sampler.remove(_id)
+                self.statistics.record_resolutions(died)
+                self.total_dead += died.count(1)
+                self.logger.log_infection_survivals(block, died)
+        self.current_infected -= len(infected_ids)
+        if self.checkpoint is not None:
+            self.checkpoint.mark_resolved(infected_ids)
 
     def interaction(self, person, random_person):
-        # TODO: Finish this method! This method should be called any time two living
-        # people are selected for an interaction.  That means that only living people
-        # should be passed into this method.  Assert statements are included to make sure
-        # that this doesn't happen.
-        assert person1.is_alive == True
+        # Only living people should be passed into this method.
+        assert person.is_alive == True
         assert random_person.is_alive == True
 
-        # The possible cases you'll need to cover are listed below:
-            # random_person is vaccinated:
-            #     nothing happens to random person.
-            # random_person is already infected:
-            #     nothing happens to random person.
-            # random_person is healthy, but unvaccinated:
-            #     generate a random number between 0 and 1.  If that number is smaller
-            #     than basic_repro_num, random_person's ID should be appended to
-            #     Simulation object's newly_infected array, so that their .infected
-            #     attribute can be changed to True at the end of the time step.
-        # TODO: Remember to call self.logger.log_interaction() during this method!
-        pass
+        if random_person.is_vaccinated:
+            self.logger.log_interaction(person, random_person, person2_vacc=True)
+            self.statistics.record_interaction(VACCINATED)
+        elif random_person.infected_with is not None:
+            self.logger.log_interaction(person, random_person, person2_sick=True)
+            self.statistics.record_interaction(ALREADY_SICK)
+        elif self.rng.random() < self.basic_repro_num:
+            # The infection takes hold at the end of the time step.
+            self.newly_infected.add(random_person._id)
+            self.logger.log_interaction(person, random_person, did_infect=True)
+            self.statistics.record_interaction(INFECTED)
+        else:
+            self.logger.log_interaction(person, random_person, did_infect=False)
+            self.statistics.record_interaction(NOT_INFECTED)
+
+    def _person_by_id(self, _id):
+        if self.backend == 'arrays':
+            return self.population[_id]
+        return self.population[self.id_index[_id]]
 
     def _infect_newly_infected(self):
-        # TODO: Finish this method! This method should be called at the end of
-        # every time step.  This method should iterate through the list stored in
-        # self.newly_infected, which should be filled with the IDs of every person
-        # created.  Iterate though this list.
-        # For every person id in self.newly_infected:
-        #   - Find the Person object in self.population that has this corresponding ID.
-        #   - Set this Person's .infected attribute to True.
-        # NOTE: Once you have iterated through the entire list of self.newly_infected, remember
-        # to reset self.newly_infected back to an empty list!
+        # Each ID is looked up directly, so this costs O(len(self.newly_infected))
+        # however big the population is.
+        for _id in self.newly_infected:
+            self._person_by_id(_id).infected_with = self.virus
+        self.total_infected += len(self.newly_infected)
+        self.current_infected += len(self.newly_infected)
+        self.statistics.record_infections(len(self.newly_infected))
+        if self.checkpoint is not None:
+            self.checkpoint.mark_infected(self.newly_infected)
+        self.newly_infected = set()
+
+
+def repeat_each(ids, times):
+    '''
+    Returns a list with every one of ids repeated times in a row.
+    '''
+    return list(chain.from_iterable(zip(*repeat(ids, times))))
+
+
+def bernoulli_mask(count, probability, rng=random):
+    '''
+    Runs count independent trials that each succeed with probability, and returns
+    bytes that are 1 for every trial that succeeded and 0 for the rest.
+
+    Each trial gets PROBABILITY_BYTES random bytes, read as a fraction, and succeeds
+    if that fraction is below probability.  The comparison is done a byte at a time
+    for every trial at once: bytes.translate() marks the trials whose byte is below
+    (or equal to) the matching byte of probability, and the marks are combined with
+    bitwise operations on big ints.  probability is rounded to the nearest multiple
+    of 256 ** -PROBABILITY_BYTES.
+    '''
+    threshold = round(probability * 256 ** PROBABILITY_BYTES)
+    if threshold <= 0:
+        return bytes(count)
+    if threshold >= 256 ** PROBABILITY_BYTES:
+        return b'\x01' * count
+    succeeded = 0
+    # Trials whose random bytes have matched probability's so far.
+    tied = int.from_bytes(b'\x01' * count, 'big')
+    for digit in threshold.to_bytes(PROBABILITY_BYTES, 'big'):
+        random_bytes = rng.getrandbits(8 * count).to_bytes(count, 'big')
+        below = random_bytes.translate(b'\x01' * digit + bytes(256 - digit))
+        equal = random_bytes.translate(bytes(digit) + b'\x01' + bytes(255 - digit))
+        succeeded |= tied & int.from_bytes(below, 'big')
+        tied &= int.from_bytes(equal, 'big')
+        if not tied:
+            break
+    return succeeded.to_bytes(count, 'big')
+
+
+def _gather(column, ids):
+    # column[_id] for every one of ids, as bytes, with the loop running in C.
+    values = itemgetter(*ids)(column)
+    return bytes(values) if len(ids) > 1 else bytes((values,))
+
+
+def interaction_outcomes(person2_ids, is_vaccinated, is_infected, basic_repro_num, rng=random):
+    '''
+    Works out the interactions of infected people with each of person2_ids, following
+    the same rules as Simulation.interaction().  Returns a bytearray with the outcome
+    code of each interaction, and a list of the IDs that were infected.
+
+    Both columns are gathered for all partners at once and packed into big ints, so
+    2 * is_vaccinated + is_infected is worked out for every partner in a single
+    addition, and translated straight into outcome codes.  Whether an interaction
+    would spread the virus doesn't depend on the partner, so it's drawn for every
+    interaction at once with bernoulli_mask(), and only the ones with a partner who
+    is neither vaccinated nor sick turn into infections.
+    '''
+    count = len(person2_ids)
+    if count == 0:
+        return bytearray(), []
+    vaccinated = int.from_bytes(_gather(is_vaccinated, person2_ids), 'big')
+    infected = int.from_bytes(_gather(is_infected, person2_ids), 'big')
+    partners = (2 * vaccinated + infected).to_bytes(count, 'big')
+    outcomes = int.from_bytes(partners.translate(_PARTNER_OUTCOMES), 'big')
+    susceptible = int.from_bytes(partners.translate(_SUSCEPTIBLE), 'big')
+    infections = susceptible & int.from_bytes(bernoulli_mask(count, basic_repro_num, rng), 'big')
+    # Every infection turns a NOT_INFECTED byte into INFECTED, with no borrowing
+    # between bytes since INFECTED is the smaller code.
+    outcomes -= (NOT_INFECTED - INFECTED) * infections
+    return (bytearray(outcomes.to_bytes(count, 'big')),
+            list(compress(person2_ids, infections.to_bytes(count, 'big'))))
+
+
+def resolve_infections(ids, is_vaccinated, is_alive, is_infected, mortality_rate, rng=random):
+    '''
+    Same rules as Population.resolve_infection(), for every one of ids.  Returns a
+    bytearray that is 1 for each person who died, and 0 for each who survived.
+    '''
+    died = bytearray(bernoulli_mask(len(ids), mortality_rate, rng))
+    for _id, did_die in zip(ids, died):
+        is_infected[_id] = 0
+        if did_die:
+            is_alive[_id] = 0
+        else:
+            is_vaccinated[_id] = 1
+    return died
+
+
+def parse_args(args):
+    '''
+    Splits command-line arguments into the positional simulation parameters and a
+    dictionary of --name=value options.
+    '''
+    params = []
+    options = {}
+    for arg in args:
+        if arg.startswith('--'):
+            name, _, value = arg[2:].partition('=')
+            options[name.replace('-', '_')] = value
+        else:
+            params.append(arg)
+    return params, options
+
 
 if __name__ == "__main__":
-    params = sys.argv[1:]
+    params, options = parse_args(sys.argv[1:])
+    if 'resume' in options:
+        parameters = load_parameters(options['resume'])
+        simulation = Simulation(checkpoint_dir=options['resume'], resume=True, **parameters)
+        simulation.run()
+        sys.exit()
     pop_size = int(params[0])
     vacc_percentage = float(params[1])
     virus_name = str(params[2])
@@ -211,5 +532,13 @@ if __name__ == "__main__":
     else:
         initial_infected = 1
     simulation = Simulation(pop_size, vacc_percentage, virus_name, mortality_rate,
-                            basic_repro_num, initial_infected)
+                            basic_repro_num, initial_infected,
+                            backend=options.get('backend', 'objects'),
+                            batched='batched' in options,
+                            buffered_log='buffered_log' in options,
+                            log_format=options.get('log_format', 'text'),
+                            stats_file=options.get('stats_file'),
+                            seed=int(options['seed']) if 'seed' in options else None,
+                            checkpoint_dir=options.get('checkpoint'),
+                            checkpoint_every=int(options.get('checkpoint_every', 1)))
     simulation.run()
@@ -0,0 +1,101 @@
+import csv
+from array import array
+from logger import VACCINATED
+
+# Columns of the per-step time series, in order.
+SERIES_FIELDS = ('time_step', 'interactions', 'new_infections', 'vaccinated_saves',
+                 'deaths', 'survivals', 'current_infected', 'total_infected', 'total_dead')
+
+
+class StepStatistics(object):
+    '''
+    Collects summary statistics for every time step of a simulation.  The Simulation
+    calls the record_* methods as people change state, which only bump counters, so
+    keeping the statistics never costs a scan of the population.
+
+    _____Attributes______
+
+    interactions, new_infections, vaccinated_saves, deaths, survivals: Int.  Counts
+        for the time step in progress.  Reset by end_step().
+
+    series: [tuple].  One row per finished time step, with the values of
+        SERIES_FIELDS in order.
+
+    _____Methods_____
+
+    record_interaction(self, outcome):
+        -- Expects an outcome code from logger.py.
+
+    record_interactions(self, outcomes):
+        -- Same as record_interaction() for a whole list of outcome codes.
+
+    record_infections(self, count):
+        -- Expects the number of people newly infected at the end of the step.
+
+    record_resolution(self, did_survive):
+        -- Expects the result of one person's did_survive_infection().
+
+    record_resolutions(self, died):
+        -- Same as record_resolution() for a whole sequence that is 1 (or True) for
+            each person who died and 0 for each who survived.
+
+    end_step(self, time_step, current_infected, total_infected, total_dead):
+        -- Appends a row for the finished step to self.series and resets the
+            per-step counts.
+
+    to_csv(self, file_name):
+        -- Writes self.series to a CSV file with a header row.
+
+    as_arrays(self):
+        -- Returns a dictionary mapping each of SERIES_FIELDS to an array of ints.
+    '''
+
+    def __init__(self):
+        self.series = []
+        self._reset()
+
+    def _reset(self):
+        self.interactions = 0
+        self.new_infections = 0
+        self.vaccinated_saves = 0
+        self.deaths = 0
+        self.survivals = 0
+
+    def record_interaction(self, outcome):
+        self.interactions += 1
+        if outcome == VACCINATED:
+            self.vaccinated_saves += 1
+
+    def record_interactions(self, outcomes):
+        self.interactions += len(outcomes)
+        self.vaccinated_saves += outcomes.count(VACCINATED)
+
+    def record_infections(self, count):
+        self.new_infections += count
+
+    def record_resolution(self, did_survive):
+        if did_survive:
+            self.survivals += 1
+        else:
+            self.deaths += 1
+
+    def record_resolutions(self, died):
+        deaths = sum(died)
+        self.deaths += deaths
+        self.survivals += len(died) - deaths
+
+    def end_step(self, time_step, current_infected, total_infected, total_dead):
+        self.series.append((time_step, self.interactions, self.new_infections,
+                            self.vaccinated_saves, self.deaths, self.survivals,
+                            current_infected, total_infected, total_dead))
+        self._reset()
+
+    def to_csv(self, file_name):
+        with open(file_name, 'w', newline='') as csv_file:
+            writer = csv.writer(csv_file)
+            writer.writerow(SERIES_FIELDS)
+            writer.writerows(self.series)
+
+    def as_arrays(self):
+        return {name: array('q', [row[column] for row in self.series])
+                for column, name in enumerate(SERIES_FIELDS)}
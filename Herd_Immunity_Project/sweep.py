@@ -0,0 +1,127 @@
+'''
+Runs many herd immunity simulations at once, one per parameter set, spread across
+a pool of worker processes.
+
+Every run gets its own seed, drawn from a single base seed, so a whole sweep can be
+reproduced exactly, and any one run can be rerun on its own with
+`python3 simulation.py ... --seed={seed}`.  Each run writes its log under its own
+file name in the output directory, and the sweep writes one summary row per run.
+
+Parameter sets are read from a CSV file with a header row naming the columns
+pop_size, vacc_percentage, virus_name, mortality_rate, basic_repro_num and,
+optionally, initial_infected.  Run it like this:
+
+    python3 sweep.py params.csv [--processes=N] [--seed=S] [--out-dir=sweep]
+        [--backend=arrays] [--batched] [--buffered-log] [--log-format=binary]
+'''
+import csv
+import os
+import random
+import sys
+from itertools import product
+from multiprocessing import Pool
+from simulation import Simulation, parse_args
+
+PARAM_FIELDS = ('pop_size', 'vacc_percentage', 'virus_name', 'mortality_rate',
+                'basic_repro_num', 'initial_infected')
+SUMMARY_FIELDS = ('run', 'seed') + PARAM_FIELDS + (
+    'time_steps', 'total_infected', 'total_dead', 'percent_infected', 'percent_dead',
+    'interactions', 'vaccinated_saves', 'file_name')
+
+
+def grid(pop_sizes, vacc_percentages, viruses, initial_infected=(1,)):
+    '''
+    Builds every combination of the given values as a list of parameter sets.
+    viruses is a list of (virus_name, mortality_rate, basic_repro_num) tuples.
+    '''
+    return [{'pop_size': pop_size, 'vacc_percentage': vacc_percentage,
+             'virus_name': virus_name, 'mortality_rate': mortality_rate,
+             'basic_repro_num': basic_repro_num, 'initial_infected': infected}
+            for pop_size, vacc_percentage, (virus_name, mortality_rate, basic_repro_num),
+            infected in product(pop_sizes, vacc_percentages, viruses, initial_infected)]
+
+
+def read_params(file_name):
+    param_sets = []
+    with open(file_name, newline='') as csv_file:
+        for row in csv.DictReader(csv_file):
+            param_sets.append({
+                'pop_size': int(row['pop_size']),
+                'vacc_percentage': float(row['vacc_percentage']),
+                'virus_name': row['virus_name'],
+                'mortality_rate': float(row['mortality_rate']),
+                'basic_repro_num': float(row['basic_repro_num']),
+                'initial_infected': int(row.get('initial_infected') or 1),
+            })
+    return param_sets
+
+
+def run_seeds(base_seed, count):
+    # One independent 64-bit seed per run, all drawn from the base seed.
+    seed_source = random.Random(base_seed)
+    return [seed_source.getrandbits(64) for _ in range(count)]
+
+
+def _run_one(job):
+    run, seed, params, out_dir, options = job
+    file_name = os.path.join(out_dir, 'run_{:04d}_{}_simulation_pop_{}_vp_{}_infected_{}.txt'.format(
+        run, params['virus_name'], params['pop_size'], params['vacc_percentage'],
+        params['initial_infected']))
+    simulation = Simulation(params['pop_size'], params['vacc_percentage'],
+                            params['virus_name'], params['mortality_rate'],
+                            params['basic_repro_num'], params['initial_infected'],
+                            seed=seed, file_name=file_name, **options)
+    time_steps = simulation.run()
+    series = simulation.statistics.series
+    summary = {'run': run, 'seed': seed, 'time_steps': time_steps,
+               'total_infected': simulation.total_infected,
+               'total_dead': simulation.total_dead,
+               'percent_infected': 100.0 * simulation.total_infected / params['pop_size'],
+               'percent_dead': 100.0 * simulation.total_dead / params['pop_size'],
+               'interactions': sum(row[1] for row in series),
+               'vaccinated_saves': sum(row[3] for row in series),
+               'file_name': simulation.file_name}
+    summary.update(params)
+    return summary
+
+
+def run_sweep(param_sets, processes=None, base_seed=42, out_dir='sweep', **options):
+    '''
+    Runs one simulation per parameter set across a process pool, and returns one
+    summary dictionary per run, in the order of param_sets.  Any extra keyword
+    arguments (backend, batched, buffered_log, log_format) are passed to every
+    Simulation.
+    '''
+    os.makedirs(out_dir, exist_ok=True)
+    seeds = run_seeds(base_seed, len(param_sets))
+    jobs = [(run, seed, params, out_dir, options)
+            for run, (seed, params) in enumerate(zip(seeds, param_sets))]
+    with Pool(processes) as pool:
+        summaries = list(pool.imap_unordered(_run_one, jobs))
+    return sorted(summaries, key=lambda summary: summary['run'])
+
+
+def write_summary(summaries, file_name):
+    with open(file_name, 'w', newline='') as csv_file:
+        writer = csv.DictWriter(csv_file, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(summaries)
+
+
+if __name__ == "__main__":
+    params, options = parse_args(sys.argv[1:])
+    param_sets = read_params(params[0])
+    processes = int(options.pop('processes')) if 'processes' in options else None
+    base_seed = int(options.pop('seed', 42))
+    out_dir = options.pop('out_dir', 'sweep')
+    simulation_options = {}
+    if 'backend' in options:
+        simulation_options['backend'] = options['backend']
+    if 'log_format' in options:
+        simulation_options['log_format'] = options['log_format']
+    simulation_options['batched'] = 'batched' in options
+    simulation_options['buffered_log'] = 'buffered_log' in options
+    summaries = run_sweep(param_sets, processes, base_seed, out_dir, **simulation_options)
+    summary_file = os.path.join(out_dir, 'summary.csv')
+    write_summary(summaries, summary_file)
+    print('Finished {} runs.  Summary written to {}'.format(len(summaries), summary_file))
@@ -0,0 +1,54 @@
+import pytest
+from analyze import FIELDS, PATTERNS, STEP_MARKER, analyze
+from simulation import Simulation
+
+
+@pytest.fixture(scope='module')
+def simulation(tmp_path_factory):
+    file_name = str(tmp_path_factory.mktemp('analyze') / 'run.log')
+    simulation = Simulation(2000, 0.4, 'Testvirus', 0.3, 0.015, 10, seed=3, file_name=file_name)
+    simulation.run()
+    return simulation
+
+
+def scan_lines(file_name):
+    # The obvious way: one pass over the lines, in order.  Returns the totals and
+    # the counts of every time step, like analyze() does.
+    totals = dict.fromkeys(FIELDS, 0)
+    series = {}
+    counts = dict.fromkeys(FIELDS, 0)
+    with open(file_name, 'rb') as log_file:
+        log_file.readline()
+        for line in log_file:
+            if line.startswith(STEP_MARKER):
+                series[int(line.split()[2])] = counts
+                counts = dict.fromkeys(FIELDS, 0)
+                continue
+            for name, pattern in PATTERNS:
+                if pattern in line:
+                    counts[name] += 1
+                    totals[name] += 1
+    return totals, series
+
+
+@pytest.mark.parametrize('processes, block_size', [(1, 1 << 24), (3, 1 << 24), (3, 1000),
+                                                   (2, 37)])
+def test_byte_ranges_match_single_pass(simulation, processes, block_size):
+    totals, series = scan_lines(simulation.file_name)
+    results = analyze([simulation.file_name], processes=processes, block_size=block_size)
+    assert {name: results['totals'][name] for name in FIELDS} == totals
+    assert {step: {name: counts[name] for name in FIELDS}
+            for step, counts in results['series'].items()} == series
+
+
+def test_matches_simulation_statistics(simulation):
+    results = analyze([simulation.file_name], processes=2, block_size=4096)
+    assert results['metadata']['pop_size'] == 2000
+    for (step, interactions, new_infections, vaccinated_saves, deaths, survivals,
+         current_infected, total_infected, total_dead) in simulation.statistics.series:
+        counts = results['series'][step]
+        assert counts['interactions'] == interactions
+        assert counts['vaccinated_saves'] == vaccinated_saves
+        assert counts['deaths'] == deaths
+        assert counts['survivals'] == survivals
+    assert results['answers']['percent_dead'] == 100.0 * simulation.total_dead / 2000
@@ -0,0 +1,92 @@
+import random
+import pytest
+from analyze import analyze
+from logger import INFECTED, VACCINATED, ALREADY_SICK, NOT_INFECTED
+from simulation import Simulation, bernoulli_mask, interaction_outcomes, resolve_infections
+
+TRIALS = 100000
+
+
+@pytest.mark.parametrize('probability', [0, 0.01, 0.5, 1])
+def test_bernoulli_mask_success_rate(probability):
+    mask = bernoulli_mask(TRIALS, probability, random.Random(1))
+    assert len(mask) == TRIALS
+    assert set(mask) <= {0, 1}
+    successes = mask.count(1)
+    if probability in (0, 1):
+        assert successes == probability * TRIALS
+    else:
+        # Well over five standard deviations either way.
+        spread = 6 * (TRIALS * probability * (1 - probability)) ** 0.5
+        assert abs(successes - probability * TRIALS) < spread
+
+
+def test_bernoulli_mask_empty():
+    assert bernoulli_mask(0, 0.5, random.Random(1)) == b''
+
+
+# Person 0 is vaccinated, 1 is sick, 2 and 3 are susceptible, and 4 is both
+# vaccinated and sick, which counts as vaccinated like Simulation.interaction().
+IS_VACCINATED = bytearray([1, 0, 0, 0, 1])
+IS_INFECTED = bytearray([0, 1, 0, 0, 1])
+PARTNERS = [0, 1, 2, 3, 4, 2, 0, 3, 1]
+
+
+@pytest.mark.parametrize('basic_repro_num', [0, 0.5, 1])
+def test_interaction_outcomes(basic_repro_num):
+    outcomes, infected = interaction_outcomes(PARTNERS, IS_VACCINATED, IS_INFECTED,
+                                              basic_repro_num, random.Random(2))
+    assert len(outcomes) == len(PARTNERS)
+    for _id, outcome in zip(PARTNERS, outcomes):
+        if IS_VACCINATED[_id]:
+            assert outcome == VACCINATED
+        elif IS_INFECTED[_id]:
+            assert outcome == ALREADY_SICK
+        else:
+            assert outcome in (INFECTED, NOT_INFECTED)
+    assert infected == [_id for _id, outcome in zip(PARTNERS, outcomes) if outcome == INFECTED]
+    if basic_repro_num == 0:
+        assert infected == []
+    if basic_repro_num == 1:
+        assert infected == [2, 3, 2, 3]
+
+
+def test_interaction_outcomes_with_no_partners():
+    assert interaction_outcomes([], IS_VACCINATED, IS_INFECTED, 1) == (bytearray(), [])
+
+
+@pytest.mark.parametrize('mortality_rate', [0, 0.5, 1])
+def test_resolve_infections(mortality_rate):
+    ids = [1, 2, 4]
+    is_vaccinated = bytearray([0, 0, 0, 0, 1])
+    is_alive = bytearray(b'\x01' * 5)
+    is_infected = bytearray([0, 1, 1, 0, 1])
+    died = resolve_infections(ids, is_vaccinated, is_alive, is_infected, mortality_rate,
+                              random.Random(3))
+    assert len(died) == len(ids)
+    if mortality_rate in (0, 1):
+        assert list(died) == [mortality_rate] * len(ids)
+    assert is_infected == bytearray(5)
+    for _id, did_die in zip(ids, died):
+        assert is_alive[_id] == 1 - did_die
+        if not did_die:
+            assert is_vaccinated[_id] == 1
+    assert is_alive[0] == is_alive[3] == 1
+    assert is_vaccinated[0] == is_vaccinated[3] == 0
+
+
+def test_batched_statistics_match_log(tmp_path):
+    file_name = str(tmp_path / 'batched.log')
+    simulation = Simulation(2000, 0.4, 'Testvirus', 0.3, 0.015, 10, backend='arrays',
+                            batched=True, seed=11, file_name=file_name)
+    steps = simulation.run()
+    assert len(simulation.statistics.series) == steps
+    results = analyze([file_name], processes=1)
+    for (step, interactions, new_infections, vaccinated_saves, deaths, survivals,
+         current_infected, total_infected, total_dead) in simulation.statistics.series:
+        counts = results['series'][step]
+        assert counts['interactions'] == interactions
+        assert counts['vaccinated_saves'] == vaccinated_saves
+        assert counts['deaths'] == deaths
+        assert counts['survivals'] == survivals
+    assert results['totals']['deaths'] == simulation.total_dead
@@ -0,0 +1,56 @@
+import pytest
+from checkpoint import load_parameters
+from simulation import Simulation
+
+# A small outbreak that lasts well over ten time steps either way.
+PARAMETERS = (2000, 0.4, 'Testvirus', 0.3, 0.015, 10)
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_at(simulation, time_step):
+    # Makes simulation stop with Interrupted when it gets to time_step, as if it
+    # had been killed part way through.
+    time_step_method = simulation.time_step
+
+    def time_step_or_stop():
+        if simulation.time_step_counter == time_step:
+            raise Interrupted()
+        return time_step_method()
+
+    simulation.time_step = time_step_or_stop
+
+
+@pytest.mark.parametrize('batched', [False, True])
+@pytest.mark.parametrize('log_format', ['text', 'binary'])
+@pytest.mark.parametrize('stop_at', [3, 6])
+def test_resume_matches_uninterrupted_run(tmp_path, batched, log_format, stop_at):
+    options = dict(backend='arrays', batched=batched, log_format=log_format, seed=7)
+    uninterrupted = Simulation(*PARAMETERS, file_name=str(tmp_path / 'whole.log'), **options)
+    steps = uninterrupted.run()
+    assert steps > stop_at + 1
+
+    checkpoint_dir = str(tmp_path / 'checkpoint')
+    interrupted = Simulation(*PARAMETERS, file_name=str(tmp_path / 'resumed.log'),
+                             checkpoint_dir=checkpoint_dir, checkpoint_every=2, **options)
+    interrupt_at(interrupted, stop_at)
+    with pytest.raises(Interrupted):
+        interrupted.run()
+    interrupted.logger.close()
+
+    resumed = Simulation(checkpoint_dir=checkpoint_dir, resume=True,
+                         **load_parameters(checkpoint_dir))
+    assert resumed.run() == steps
+    assert resumed.statistics.series == uninterrupted.statistics.series
+    assert resumed.population.is_alive == uninterrupted.population.is_alive
+    with open(tmp_path / 'whole.log', 'rb') as whole, \
+            open(tmp_path / 'resumed.log', 'rb') as resumed_log:
+        assert resumed_log.read() == whole.read()
+
+
+def test_resume_needs_a_checkpoint(tmp_path):
+    with pytest.raises(ValueError):
+        Simulation(*PARAMETERS, backend='arrays', file_name=str(tmp_path / 'run.log'),
+                   checkpoint_dir=str(tmp_path / 'empty'), resume=True)
@@ -0,0 +1,36 @@
+import pytest
+from simulation import Simulation
+
+PARAMETERS = (1000, 0.4, 'Testvirus', 0.3, 0.015, 5)
+
+
+def run(file_name, buffered_log, **options):
+    simulation = Simulation(*PARAMETERS, buffered_log=buffered_log, seed=9,
+                            file_name=file_name, **options)
+    logger = simulation.logger
+    flushes = []
+    if buffered_log:
+        # Small enough that the buffer fills, and gets written out, part way through
+        # every time step as well as at the end of it.
+        logger.buffer_size = 200
+        flush = logger.flush
+
+        def counted_flush():
+            flushes.append(logger._buffer_length)
+            flush()
+
+        logger.flush = counted_flush
+    steps = simulation.run()
+    logger.close()
+    with open(file_name, 'rb') as log_file:
+        return log_file.read(), steps, flushes
+
+
+@pytest.mark.parametrize('options', [dict(backend='objects'), dict(backend='arrays'),
+                                     dict(backend='arrays', batched=True)])
+def test_buffered_log_matches_unbuffered(tmp_path, options):
+    unbuffered, steps, _ = run(str(tmp_path / 'unbuffered.log'), False, **options)
+    buffered, buffered_steps, flushes = run(str(tmp_path / 'buffered.log'), True, **options)
+    assert buffered_steps == steps
+    assert len([length for length in flushes if length >= 200]) > steps
+    assert buffered == unbuffered
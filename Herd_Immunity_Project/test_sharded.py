@@ -0,0 +1,46 @@
+import pytest
+from multiprocessing.shared_memory import SharedMemory
+from analyze import analyze
+from sharded import ShardedSimulation
+
+
+def test_statistics_match_shard_logs(tmp_path):
+    file_name = str(tmp_path / 'run.log')
+    simulation = ShardedSimulation(2000, 0.4, 'Testvirus', 0.3, 0.015, 10, shards=2, seed=5,
+                                   file_name=file_name)
+    steps = simulation.run()
+    assert len(simulation.statistics.series) == steps
+    results = analyze([file_name, str(tmp_path / 'run.shard0.log'),
+                       str(tmp_path / 'run.shard1.log')], processes=1)
+    assert results['metadata']['pop_size'] == 2000
+    for (step, interactions, new_infections, vaccinated_saves, deaths, survivals,
+         current_infected, total_infected, total_dead) in simulation.statistics.series:
+        counts = results['series'][step]
+        assert counts['interactions'] == interactions
+        assert counts['vaccinated_saves'] == vaccinated_saves
+        assert counts['deaths'] == deaths
+        assert counts['survivals'] == survivals
+    assert results['totals']['deaths'] == simulation.total_dead
+
+
+class Failed(Exception):
+    pass
+
+
+def test_failed_start_releases_shared_memory(tmp_path, monkeypatch):
+    names = []
+    start_workers = ShardedSimulation._start_workers
+
+    def start_workers_then_fail(simulation):
+        start_workers(simulation)
+        names.extend([simulation._state.name, simulation._live.name])
+        raise Failed()
+
+    monkeypatch.setattr(ShardedSimulation, '_start_workers', start_workers_then_fail)
+    with pytest.raises(Failed):
+        ShardedSimulation(100, 0.4, 'Testvirus', 0.3, 0.015, shards=2,
+                          file_name=str(tmp_path / 'run.log'))
+    assert len(names) == 2
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            SharedMemory(name=name)
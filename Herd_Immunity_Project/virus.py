@@ -0,0 +1,21 @@
+class Virus(object):
+    '''
+    Holds the data for the virus spreading through the simulation.  Viruses are
+    static in this simulation, so a single Virus object is shared by every infected
+    person.
+
+    _____Attributes______
+
+    name: String.  The name of the virus.
+
+    mortality_rate: Float between 0 and 1.  The chance an infected person dies
+        at the end of a time step.
+
+    basic_repro_num: Float between 0 and 1.  The chance an infected person infects
+        a healthy, unvaccinated person they interact with.
+    '''
+
+    def __init__(self, name, mortality_rate, basic_repro_num):
+        self.name = name
+        self.mortality_rate = mortality_rate
+        self.basic_repro_num = basic_repro_num
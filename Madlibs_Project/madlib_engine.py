@@ -0,0 +1,173 @@
+'''
+Generates MadLibs stories in bulk, with every blank filled by a random word of the
+right type from a word bank.
+
+Templates are compiled once into their literal text and their typed slots, so
+rendering a story is one join of the literal text with the chosen words and never
+looks at the template text again.  The word bank (word_bank.txt) has a line of
+comma-separated words for each type of word, like "noun: banana, robot, ...".
+generate_stories() yields stories one at a time, picking words for a batch of
+stories at once, so memory use stays the same however many are generated.
+
+    python3 madlib_engine.py [--count=10] [--title=The Spaceman] [--seed=42]
+        [--benchmark]
+
+With --benchmark, the stories are generated but not printed, and the rate is
+reported instead.
+'''
+import os
+import random
+import sys
+from time import perf_counter
+from madlibs import BLANK, load_templates
+
+WORD_BANK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'word_bank.txt')
+# How many stories generate_stories() picks words for at a time.
+BATCH_SIZE = 1024
+
+
+class CompiledTemplate(object):
+    '''
+    A MadLibs story split into literal text and typed slots.
+
+    _____Attributes______
+
+    title: String.  The story's title.
+
+    literals: (String).  The text around the slots: before the first slot, between
+        each pair of slots, and after the last one.
+
+    slots: (String).  The type of word for each slot, in order.
+
+    _____Methods_____
+
+    render(self, words):
+        -- Returns the story with words, one per slot, filled in.
+    '''
+
+    def __init__(self, template, title=None):
+        self.title = title
+        pieces = BLANK.split(template)
+        self.literals = tuple(pieces[0::2])
+        self.slots = tuple(pieces[1::2])
+        # Literals go at the even indexes; render() drops the words into the odd ones.
+        self._parts = [None] * (2 * len(self.slots) + 1)
+        self._parts[0::2] = self.literals
+
+    def render(self, words):
+        parts = self._parts[:]
+        parts[1::2] = words
+        return ''.join(parts)
+
+
+class WordBank(object):
+    '''
+    Words to fill slots with, by type of word.
+
+    _____Attributes______
+
+    words: {String: (String)}.  The words of each type.
+
+    _____Methods_____
+
+    random_words(self, template, rng=random):
+        -- Returns a random word of the right type for each of template's slots.
+
+    random_batch(self, template, count, rng=random):
+        -- Returns random words for count stories from template, as a list with
+            the words for each story.
+    '''
+
+    def __init__(self, words):
+        self.words = {word_type: tuple(type_words) for word_type, type_words in words.items()}
+
+    @classmethod
+    def from_file(cls, file_name=WORD_BANK_FILE):
+        words = {}
+        with open(file_name) as bank_file:
+            for line in bank_file:
+                word_type, _, type_words = line.partition(':')
+                if type_words.strip():
+                    words[word_type.strip()] = [word.strip() for word in type_words.split(',')]
+        return cls(words)
+
+    def _slot_words(self, template):
+        try:
+            return [self.words[word_type] for word_type in template.slots]
+        except KeyError as error:
+            raise ValueError('the word bank has no words of type {}'.format(error.args[0]))
+
+    def random_words(self, template, rng=random):
+        return [rng.choice(words) for words in self._slot_words(template)]
+
+    def random_batch(self, template, count, rng=random):
+        # A column of count words per slot, turned into a row of words per story.
+        columns = [rng.choices(words, k=count) for words in self._slot_words(template)]
+        return list(zip(*columns))
+
+
+def shuffle_words(template, words, rng=random):
+    '''
+    Returns words with the words of each type shuffled among the slots of that type,
+    like shuffling all of the nouns the player gave.
+    '''
+    positions = {}
+    for position, word_type in enumerate(template.slots):
+        positions.setdefault(word_type, []).append(position)
+    shuffled = list(words)
+    for type_positions in positions.values():
+        type_words = [shuffled[position] for position in type_positions]
+        rng.shuffle(type_words)
+        for position, word in zip(type_positions, type_words):
+            shuffled[position] = word
+    return shuffled
+
+
+def compile_templates(templates):
+    '''
+    Compiles {title: story} from madlibs.load_templates() into {title: CompiledTemplate}.
+    '''
+    return {title: CompiledTemplate(template, title) for title, template in templates.items()}
+
+
+def generate_stories(templates, word_bank, count, rng=random, batch_size=BATCH_SIZE):
+    '''
+    Yields count stories, each from a random one of templates (a list of
+    CompiledTemplates) with random words from word_bank.
+    '''
+    while count > 0:
+        batch = min(batch_size, count)
+        count -= batch
+        if len(templates) == 1:
+            picks = {0: batch}
+        else:
+            picks = {}
+            for index in rng.choices(range(len(templates)), k=batch):
+                picks[index] = picks.get(index, 0) + 1
+        for index, stories in picks.items():
+            template = templates[index]
+            render = template.render
+            for words in word_bank.random_batch(template, stories, rng):
+                yield render(words)
+
+
+if __name__ == "__main__":
+    options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+    templates = compile_templates(load_templates())
+    if 'title' in options:
+        templates = {options['title']: templates[options['title']]}
+    word_bank = WordBank.from_file()
+    rng = random.Random(int(options['seed'])) if 'seed' in options else random
+    count = int(float(options.get('count', 10)))
+    stories = generate_stories(list(templates.values()), word_bank, count, rng)
+    if 'benchmark' in options:
+        started = perf_counter()
+        for story in stories:
+            pass
+        seconds = perf_counter() - started
+        print('{} stories in {:.2f} seconds, {:.0f} stories/sec'.format(
+            count, seconds, count / seconds))
+    else:
+        for story in stories:
+            print(story)
+            print()
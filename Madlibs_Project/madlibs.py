@@ -0,0 +1,85 @@
+'''
+MadLibs: fills in the blanks of a story with words typed in by the player.
+
+Stories live in templates.txt, separated by blank lines.  The first line of each is
+its title, and the rest is the story, with blanks written as the type of word that
+goes there in braces, like {noun}, {verb_past} or {plural_noun}.
+
+    python3 madlibs.py [title]
+'''
+import os
+import random
+import re
+import sys
+
+TEMPLATES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates.txt')
+BLANK = re.compile(r'\{(\w+)\}')
+# How to ask for the word types whose names don't explain themselves.
+BLANK_DESCRIPTIONS = {
+    'verb_past': 'verb (past tense)',
+    'verb_ing': 'verb ending in -ing',
+}
+
+
+def load_templates(file_name=TEMPLATES_FILE):
+    '''
+    Returns {title: story} for every story in file_name.
+    '''
+    with open(file_name) as templates_file:
+        text = templates_file.read()
+    templates = {}
+    for block in text.strip().split('\n\n'):
+        title, _, story = block.strip().partition('\n')
+        templates[title.strip()] = ' '.join(story.split('\n'))
+    return templates
+
+
+def get_blanks(template):
+    '''
+    Returns the type of word for each blank in template, in order.
+    '''
+    return BLANK.findall(template)
+
+
+def describe_blank(word_type):
+    '''
+    Turns a blank's word type into something to ask the player for, like
+    'verb (past tense)' for verb_past.
+    '''
+    return BLANK_DESCRIPTIONS.get(word_type, word_type.replace('_', ' '))
+
+
+def fill_in(template, words):
+    '''
+    Returns template with its blanks replaced by words, in order.
+    '''
+    words = iter(words)
+    return BLANK.sub(lambda match: next(words), template)
+
+
+def madlibs(template):
+    '''
+    Asks the player for a word for every blank in template, then prints the story.
+    If input ends before every blank is filled in, stops without the story.
+    '''
+    words = []
+    for word_type in get_blanks(template):
+        description = describe_blank(word_type)
+        article = 'an' if description[0] in 'aeiou' else 'a'
+        word = ''
+        while not word:
+            try:
+                word = input('Give me {} {}: '.format(article, description)).strip()
+            except EOFError:
+                print()
+                return
+        words.append(word)
+    print()
+    print(fill_in(template, words))
+
+
+if __name__ == "__main__":
+    templates = load_templates()
+    title = ' '.join(sys.argv[1:]) or random.choice(list(templates))
+    print(title)
+    madlibs(templates[title])
@@ -0,0 +1,66 @@
+import builtins
+from madlibs import describe_blank, fill_in, get_blanks, load_templates, madlibs
+
+TEMPLATE = 'The {adjective} {noun} {verb_past} over an {noun}.'
+
+
+def answer_with(monkeypatch, answers):
+    # Replaces input() with one that gives answers in turn, then raises EOFError like
+    # input() does at the end of a file, and returns the prompts.
+    answers = iter(answers)
+    prompts = []
+
+    def fake_input(prompt=''):
+        prompts.append(prompt)
+        for answer in answers:
+            return answer
+        raise EOFError()
+
+    monkeypatch.setattr(builtins, 'input', fake_input)
+    return prompts
+
+
+def test_get_blanks_lists_word_types_in_order():
+    assert get_blanks(TEMPLATE) == ['adjective', 'noun', 'verb_past', 'noun']
+
+
+def test_describe_blank():
+    assert describe_blank('verb_past') == 'verb (past tense)'
+    assert describe_blank('plural_noun') == 'plural noun'
+
+
+def test_fill_in_replaces_blanks_in_order():
+    assert fill_in(TEMPLATE, ['green', 'frog', 'jumped', 'egg']) == \
+        'The green frog jumped over an egg.'
+
+
+def test_madlibs_asks_for_every_blank(monkeypatch, capsys):
+    prompts = answer_with(monkeypatch, ['green', 'frog', 'jumped', 'egg'])
+    madlibs(TEMPLATE)
+    assert prompts == ['Give me an adjective: ', 'Give me a noun: ',
+                       'Give me a verb (past tense): ', 'Give me a noun: ']
+    assert 'The green frog jumped over an egg.' in capsys.readouterr().out
+
+
+def test_madlibs_asks_again_for_blank_input(monkeypatch, capsys):
+    prompts = answer_with(monkeypatch, ['', '   ', ' green ', 'frog', 'jumped', 'egg'])
+    madlibs(TEMPLATE)
+    assert len(prompts) == 6
+    assert 'The green frog jumped over an egg.' in capsys.readouterr().out
+
+
+def test_madlibs_stops_when_input_ends(monkeypatch, capsys):
+    prompts = answer_with(monkeypatch, ['green', 'frog'])
+    madlibs(TEMPLATE)
+    assert len(prompts) == 3
+    assert 'green' not in capsys.readouterr().out
+
+
+def test_every_template_fills_in(monkeypatch, capsys):
+    for title, template in load_templates().items():
+        blanks = get_blanks(template)
+        assert blanks, title
+        answer_with(monkeypatch, ['word{}'.format(i) for i in range(len(blanks))])
+        madlibs(template)
+        story = capsys.readouterr().out
+        assert '{' not in story and 'word{}'.format(len(blanks) - 1) in story
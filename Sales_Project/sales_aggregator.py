@@ -0,0 +1,273 @@
+'''
+Totals, counts, minimums, maximums and means of the sales in sales_data.txt, grouped
+by city, by month and by payment type.
+
+Every row of sales_data.txt is tab-separated: city, M/D date, payment type, and an
+amount like "$2025.97".  Amounts are kept as whole cents (ints) the whole way
+through, so no floats are ever parsed.
+
+The file is memory-mapped and split into byte ranges lined up with line boundaries,
+and a pool of worker processes aggregates the ranges in parallel.  Each worker
+reads its range in blocks of BLOCK_SIZE bytes, and groups the rows of each block by
+(city, month, payment type), which is only a few hundred groups, so its memory use
+stays the same however big the file is.  The groups are merged and rolled up into
+the three groupings at the end.
+
+Blank lines and Windows line endings are skipped over; a row without exactly four
+fields, or with a date or amount that doesn't look like the ones above, stops the
+aggregation with a ValueError rather than being counted in the wrong place.
+
+    python3 sales_aggregator.py [sales file] [--processes=N] [--cached]
+
+With --cached, the sales are read from the columnar cache (see sales_cache.py)
+instead of being parsed.
+'''
+import mmap
+import os
+import re
+import sys
+from itertools import repeat
+from multiprocessing import Pool
+
+DEFAULT_SALES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                  '..', 'sales_data.txt')
+DIMENSIONS = ('city', 'month', 'payment_type')
+# Ranges smaller than this aren't worth handing to another process.
+MIN_RANGE_SIZE = 1 << 20
+# How many bytes of its range a worker aggregates at a time.  Split into fields,
+# a block takes up about 20 times its size in memory.
+BLOCK_SIZE = 1 << 22
+FIELDS_PER_ROW = 4
+# Every valid date, as month/day, with or without leading zeros.
+DATES = frozenset(date.encode('ascii') for month in range(1, 13) for day in range(1, 32)
+                  for date in ('{}/{}'.format(month, day), '{:02d}/{:02d}'.format(month, day),
+                               '{}/{:02d}'.format(month, day), '{:02d}/{}'.format(month, day)))
+AMOUNT = re.compile(rb'\$\d+(?:\.\d\d?)?')
+# Turns every digit into a 9, which leaves just the shape of an amount.
+_NINES = bytes.maketrans(b'012345678', b'999999999')
+
+
+def parse_cents(amount):
+    '''
+    Converts an amount like b'$2025.97', b'$5554.7' or b'$12' to whole cents.
+    Raises ValueError for anything else.
+    '''
+    if not AMOUNT.fullmatch(amount):
+        raise ValueError(_bad_amount(amount))
+    dollars, _, cents = amount[1:].partition(b'.')
+    return int(dollars) * 100 + int(cents.ljust(2, b'0') or b'0')
+
+
+def _bad_amount(amount):
+    return '{!r} is not an amount like $2025.97'.format(amount.decode('utf-8', 'replace'))
+
+
+def check_dates(dates):
+    '''
+    Raises ValueError unless every one of dates (bytes) is a month/day like b'8/24'.
+    '''
+    if not DATES.issuperset(dates):
+        date = next(date for date in dates if date not in DATES)
+        raise ValueError('{!r} is not a date like 8/24'.format(date.decode('utf-8', 'replace')))
+
+
+def check_amounts(amounts):
+    '''
+    Raises ValueError unless every one of amounts (bytes) is like b'$2025.97'.
+    '''
+    if not amounts:
+        return
+    # Sales have only a handful of shapes (like $9999.99), so matching each shape
+    # once checks every amount, with the loop over amounts running in C.
+    for shape in set(b'\n'.join(amounts).translate(_NINES).split(b'\n')):
+        if not AMOUNT.fullmatch(shape):
+            amount = next(amount for amount in amounts if amount.translate(_NINES) == shape)
+            raise ValueError(_bad_amount(amount))
+
+
+def split_fields(data):
+    '''
+    Splits data (bytes made of whole lines) into the fields of all of its rows, in
+    order, FIELDS_PER_ROW per row.  Blank lines and carriage returns are dropped.
+    Raises ValueError if any row has the wrong number of fields, or a date or an
+    amount that check_dates() or check_amounts() rejects.
+    '''
+    lines = data.replace(b'\r', b'').split(b'\n')
+    if b'' in lines:
+        lines = [line for line in lines if line]
+    if not lines:
+        return []
+    # Every row must have one tab fewer than it has fields, or every field after it
+    # would end up in the wrong column.
+    tabs = list(map(bytes.count, lines, repeat(b'\t')))
+    if tabs.count(FIELDS_PER_ROW - 1) != len(lines):
+        line = next(line for line, count in zip(lines, tabs) if count != FIELDS_PER_ROW - 1)
+        raise ValueError('sales rows need {} tab-separated fields, not {!r}'.format(
+            FIELDS_PER_ROW, line.decode('utf-8', 'replace')))
+    # Joining the rows with tabs lets one split() cut up every field of every row at
+    # C speed; then each column is every fourth field.
+    fields = b'\t'.join(lines).split(b'\t')
+    check_dates(fields[1::4])
+    check_amounts(fields[3::4])
+    return fields
+
+
+def aggregate_rows(data):
+    '''
+    Groups the rows in data (bytes made of whole lines) by (city, month, payment
+    type), and returns {key: [count, total, min, max]} with amounts in cents.
+    '''
+    fields = split_fields(data)
+    cities = fields[0::4]
+    months = [date[:date.find(b'/')] for date in fields[1::4]]
+    payment_types = fields[2::4]
+    groups = {}
+    for key, amount in zip(zip(cities, months, payment_types), fields[3::4]):
+        # Same as parse_cents(), inlined since it runs once per row.  split_fields()
+        # has already checked that every amount is valid.
+        dollars, _, cents = amount[1:].partition(b'.')
+        cents = int(dollars) * 100 + (int(cents) * 10 if len(cents) == 1 else int(cents or b'0'))
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [1, cents, cents, cents]
+        else:
+            group[0] += 1
+            group[1] += cents
+            if cents < group[2]:
+                group[2] = cents
+            elif cents > group[3]:
+                group[3] = cents
+    return groups
+
+
+def merge_groups(into, groups):
+    for key, (count, total, minimum, maximum) in groups.items():
+        group = into.get(key)
+        if group is None:
+            into[key] = [count, total, minimum, maximum]
+        else:
+            group[0] += count
+            group[1] += total
+            group[2] = min(group[2], minimum)
+            group[3] = max(group[3], maximum)
+    return into
+
+
+def line_ranges(data, count):
+    '''
+    Splits data into at most count (start, end) byte ranges that each begin at the
+    start of a line and end just after a newline (or at the end of data).
+    '''
+    size = len(data)
+    return line_blocks(data, 0, size, max(-(-size // count), MIN_RANGE_SIZE))
+
+
+def line_blocks(data, start, end, block_size):
+    '''
+    Splits data[start:end] into (start, end) byte ranges of about block_size bytes,
+    lined up with line boundaries the same way as line_ranges().
+    '''
+    blocks = []
+    while start < end:
+        block_end = data.find(b'\n', min(start + block_size, end) - 1, end)
+        block_end = end if block_end == -1 else block_end + 1
+        blocks.append((start, block_end))
+        start = block_end
+    return blocks
+
+
+def _aggregate_range(job):
+    # Runs in a worker: maps the file and aggregates one range of it, a block of
+    # about BLOCK_SIZE bytes at a time, so only one block is ever copied out.
+    file_name, start, end = job
+    groups = {}
+    with open(file_name, 'rb') as sales_file:
+        with mmap.mmap(sales_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for block_start, block_end in line_blocks(data, start, end, BLOCK_SIZE):
+                merge_groups(groups, aggregate_rows(data[block_start:block_end]))
+    return groups
+
+
+def aggregate(file_name=DEFAULT_SALES_FILE, processes=None):
+    '''
+    Aggregates every row of file_name and returns {(city, month, payment_type):
+    [count, total, min, max]}, with strings as keys, the month as an int, and
+    amounts in cents.  Use group_by() to roll the result up by one dimension.
+    '''
+    processes = processes or os.cpu_count()
+    with open(file_name, 'rb') as sales_file:
+        if os.fstat(sales_file.fileno()).st_size == 0:
+            return {}
+        with mmap.mmap(sales_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            ranges = line_ranges(data, processes)
+    groups = {}
+    if len(ranges) == 1:
+        merge_groups(groups, _aggregate_range((file_name,) + ranges[0]))
+    else:
+        with Pool(min(processes, len(ranges))) as pool:
+            for range_groups in pool.imap_unordered(
+                    _aggregate_range, [(file_name, start, end) for start, end in ranges]):
+                merge_groups(groups, range_groups)
+    return {(city.decode('utf-8'), int(month), payment_type.decode('utf-8')): group
+            for (city, month, payment_type), group in groups.items()}
+
+
+def aggregate_columns(sales):
+    '''
+    Same as aggregate(), but from the columns of a sales_cache.SalesColumns, so
+    nothing is parsed at all.
+    '''
+    groups = {}
+    for key, cents in zip(zip(sales.column('city'), sales.column('month'),
+                              sales.column('payment_type')), sales.column('cents')):
+        group = groups.get(key)
+        if group is None:
+            groups[key] = [1, cents, cents, cents]
+        else:
+            group[0] += 1
+            group[1] += cents
+            if cents < group[2]:
+                group[2] = cents
+            elif cents > group[3]:
+                group[3] = cents
+    return {(sales.cities[city], month, sales.payment_types[payment_type]): group
+            for (city, month, payment_type), group in groups.items()}
+
+
+def group_by(groups, dimension):
+    '''
+    Rolls the result of aggregate() up by one of DIMENSIONS, and returns
+    {value: {'count', 'total', 'min', 'max', 'mean'}}, with amounts in cents
+    ('mean' is a float).
+    '''
+    index = DIMENSIONS.index(dimension)
+    rolled_up = {}
+    for key, group in groups.items():
+        merge_groups(rolled_up, {key[index]: group})
+    return {value: {'count': count, 'total': total, 'min': minimum, 'max': maximum,
+                    'mean': total / count}
+            for value, (count, total, minimum, maximum) in sorted(rolled_up.items())}
+
+
+def format_cents(cents):
+    return '${}.{:02d}'.format(cents // 100, cents % 100)
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+    file_name = args[0] if args else DEFAULT_SALES_FILE
+    if 'cached' in options:
+        import sales_cache
+        with sales_cache.load(file_name) as sales:
+            groups = aggregate_columns(sales)
+    else:
+        groups = aggregate(file_name,
+                           int(options['processes']) if 'processes' in options else None)
+    for dimension in DIMENSIONS:
+        print('By {}:'.format(dimension.replace('_', ' ')))
+        for value, stats in group_by(groups, dimension).items():
+            print('  {:<16} {:>8} sales  total {:>16}  min {:>10}  max {:>10}  mean {:>10}'.format(
+                str(value), stats['count'], format_cents(stats['total']),
+                format_cents(stats['min']), format_cents(stats['max']),
+                format_cents(round(stats['mean']))))
@@ -0,0 +1,273 @@
+'''
+Columnar binary cache of sales_data.txt, so reports can skip parsing the text.
+
+The first time a sales file is loaded, it is converted into a cache file next to it
+(sales_data.txt.columns).  Later loads memory-map the cache instead, as long as the
+sales file still has the size and modification time the cache was built from;
+otherwise the cache is rebuilt.  Columns are read straight out of the mapping, so
+nothing is copied however many sales there are.
+
+The cache also holds an index for sales_query.py: the row numbers of the sales,
+grouped by (city, month, payment type) like sales_aggregator.py groups them, so
+the sales matching a filter on those fields can be looked up rather than searched
+for.
+
+    python3 sales_cache.py [sales file] [--rebuild]
+'''
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from itertools import accumulate
+from sales_aggregator import DEFAULT_SALES_FILE, parse_cents, split_fields
+
+MAGIC = b'SALESCL3'
+CACHE_EXTENSION = '.columns'
+# Source size, source modification time (ns), row count, dictionary length.
+HEADER = struct.Struct('<QqQI')
+# Each column and its array typecode, in the order they're stored.  Cents come
+# first so they stay 8 byte aligned, then the two byte codes.
+COLUMNS = (('cents', 'q'), ('city', 'H'), ('payment_type', 'H'), ('month', 'B'),
+           ('day', 'B'))
+# The most distinct cities (or payment types) a two byte code can tell apart.
+MAX_CODES = 1 << 16
+# The columns sales are grouped by for the index.
+GROUP_KEY = ('city', 'month', 'payment_type')
+# Stored after the columns, one entry per group, in order of their codes: the codes
+# of the group, and where its row numbers end in 'group_rows'.  Then the row numbers
+# of every group in turn, each group's in file order.
+GROUP_COLUMNS = tuple(('group_' + name, dict(COLUMNS)[name]) for name in GROUP_KEY) + (
+    ('group_end', 'I'),)
+GROUP_ROWS = ('group_rows', 'I')
+# Everything stored after the header, in order.  Each one is padded to a multiple
+# of 8 bytes, so every one stays aligned.
+SECTIONS = COLUMNS + GROUP_COLUMNS + (GROUP_ROWS,)
+# How many bytes of the sales file to parse at a time while building.
+BUILD_BLOCK_SIZE = 1 << 24
+
+
+def cache_file_name(file_name):
+    return file_name + CACHE_EXTENSION
+
+
+def is_fresh(file_name, cache_file=None):
+    '''
+    Returns True if cache_file exists and was built from file_name as it is now.
+    '''
+    cache_file = cache_file or cache_file_name(file_name)
+    try:
+        with open(cache_file, 'rb') as cache:
+            header = cache.read(len(MAGIC) + HEADER.size)
+    except FileNotFoundError:
+        return False
+    if len(header) < len(MAGIC) + HEADER.size or header[:len(MAGIC)] != MAGIC:
+        return False
+    size, mtime_ns, rows, dictionary_length = HEADER.unpack_from(header, len(MAGIC))
+    source = os.stat(file_name)
+    return size == source.st_size and mtime_ns == source.st_mtime_ns
+
+
+def build(file_name=DEFAULT_SALES_FILE, cache_file=None):
+    '''
+    Parses file_name into columns and writes them to cache_file, reading the sales
+    file a block of lines at a time.  Cities and payment types are stored as codes
+    into the lists of names saved alongside the columns.  The groups index is
+    written after the columns.
+    '''
+    cache_file = cache_file or cache_file_name(file_name)
+    columns = {name: array(typecode) for name, typecode in COLUMNS}
+    city_codes = {}
+    payment_type_codes = {}
+    with open(file_name, 'rb') as sales_file:
+        source = os.fstat(sales_file.fileno())
+        while True:
+            lines = sales_file.readlines(BUILD_BLOCK_SIZE)
+            if not lines:
+                break
+            fields = split_fields(b''.join(lines))
+            columns['city'].extend(city_codes.setdefault(city, len(city_codes))
+                                   for city in fields[0::4])
+            for date in fields[1::4]:
+                month, _, day = date.partition(b'/')
+                columns['month'].append(int(month))
+                columns['day'].append(int(day))
+            columns['payment_type'].extend(
+                payment_type_codes.setdefault(payment_type, len(payment_type_codes))
+                for payment_type in fields[2::4])
+            columns['cents'].extend(map(parse_cents, fields[3::4]))
+            if len(city_codes) > MAX_CODES or len(payment_type_codes) > MAX_CODES:
+                raise ValueError('{} has more than {} cities or payment types'.format(
+                    file_name, MAX_CODES))
+
+    if len(columns['cents']) >= 1 << 32:
+        raise ValueError('{} has too many sales to index'.format(file_name))
+    columns.update(_group_columns(columns))
+
+    dictionary = json.dumps({
+        'cities': [city.decode('utf-8') for city in city_codes],
+        'payment_types': [payment_type.decode('utf-8') for payment_type in payment_type_codes],
+        'groups': len(columns['group_end']),
+    }).encode('utf-8')
+    header = MAGIC + HEADER.pack(source.st_size, source.st_mtime_ns, len(columns['cents']),
+                                 len(dictionary)) + dictionary
+    # Written to a temporary file and moved into place, so a reader never sees a
+    # half-written cache.
+    temporary = cache_file + '.tmp'
+    with open(temporary, 'wb') as cache:
+        cache.write(header + b'\0' * (-len(header) % 8))
+        for name, typecode in SECTIONS:
+            values = columns[name]
+            if sys.byteorder == 'big':
+                values.byteswap()
+            cache.write(values)
+            cache.write(b'\0' * (-len(values) * values.itemsize % 8))
+    os.replace(temporary, cache_file)
+    return cache_file
+
+
+def _group_columns(columns):
+    # Groups the row numbers by GROUP_KEY, and returns the GROUP_COLUMNS and
+    # GROUP_ROWS for the groups, as arrays keyed by name.
+    groups = {}
+    for row, key in enumerate(zip(*[columns[name] for name in GROUP_KEY])):
+        rows = groups.get(key)
+        if rows is None:
+            rows = groups[key] = array(GROUP_ROWS[1])
+        rows.append(row)
+    keys = sorted(groups)
+    group_columns = {name: array(typecode, [key[position] for key in keys])
+                     for position, (name, typecode) in enumerate(GROUP_COLUMNS[:-1])}
+    group_columns['group_end'] = array('I', accumulate(len(groups[key]) for key in keys))
+    group_rows = group_columns[GROUP_ROWS[0]] = array(GROUP_ROWS[1])
+    for key in keys:
+        group_rows.extend(groups[key])
+    return group_columns
+
+
+def load(file_name=DEFAULT_SALES_FILE, cache_file=None, rebuild=False):
+    '''
+    Returns SalesColumns for file_name, building or rebuilding the cache first if
+    it's missing or out of date (or if rebuild is True).
+    '''
+    cache_file = cache_file or cache_file_name(file_name)
+    if rebuild or not is_fresh(file_name, cache_file):
+        build(file_name, cache_file)
+    return SalesColumns(cache_file)
+
+
+class SalesColumns(object):
+    '''
+    Memory-mapped reader for the cache files build() writes.  Columns are views of
+    the mapping, so they can only be used until close().
+
+    _____Attributes______
+
+    cities: [String].  City names, indexed by the codes in the 'city' column.
+
+    payment_types: [String].  Payment type names, indexed by the codes in the
+        'payment_type' column.
+
+    _____Methods_____
+
+    column(self, name):
+        -- Returns one of the COLUMNS for every sale as a memoryview of ints:
+            amounts in cents, city and payment type codes, and month and day
+            numbers.
+
+    columns(self):
+        -- Returns a dictionary of every column, keyed by name.
+
+    groups(self):
+        -- Returns the codes of every (city, month, payment type) that has sales, as
+            a list of tuples in order.
+
+    group_rows(self, group):
+        -- Returns the row numbers of the sales in the group-th of groups(), in
+            file order, as a memoryview of ints.
+    '''
+
+    def __init__(self, file_name):
+        self.file_name = file_name
+        with open(file_name, 'rb') as cache:
+            self._mmap = mmap.mmap(cache.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            self._mmap.close()
+            raise ValueError('{} is not a sales cache file'.format(file_name))
+        (self.source_size, self.source_mtime_ns, self._rows,
+         dictionary_length) = HEADER.unpack_from(self._mmap, len(MAGIC))
+        dictionary_start = len(MAGIC) + HEADER.size
+        dictionary = json.loads(
+            self._mmap[dictionary_start:dictionary_start + dictionary_length].decode('utf-8'))
+        self.cities = dictionary['cities']
+        self.payment_types = dictionary['payment_types']
+        self._groups = dictionary['groups']
+        header_length = dictionary_start + dictionary_length
+        position = header_length + (-header_length % 8)
+        self._offsets = {}
+        for name, typecode in SECTIONS:
+            self._offsets[name] = position
+            position += self._length(name) * array(typecode).itemsize
+            position += -position % 8
+        self._columns = {}
+        self._group_ends = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._rows
+
+    def _length(self, name):
+        return self._groups if name in dict(GROUP_COLUMNS) else self._rows
+
+    def column(self, name):
+        values = self._columns.get(name)
+        if values is None:
+            typecode = dict(SECTIONS)[name]
+            start = self._offsets[name]
+            end = start + self._length(name) * array(typecode).itemsize
+            if sys.byteorder == 'big':
+                # The cache is little-endian, so it has to be copied and swapped.
+                values = array(typecode)
+                values.frombytes(self._mmap[start:end])
+                values.byteswap()
+                values = memoryview(values)
+            else:
+                values = memoryview(self._mmap)[start:end].cast(typecode)
+            self._columns[name] = values
+        return values
+
+    def columns(self):
+        return {name: self.column(name) for name, typecode in COLUMNS}
+
+    def groups(self):
+        return list(zip(*[self.column(name) for name, typecode in GROUP_COLUMNS[:-1]]))
+
+    def group_rows(self, group):
+        if self._group_ends is None:
+            self._group_ends = [0] + self.column('group_end').tolist()
+        return self.column(GROUP_ROWS[0])[self._group_ends[group]:self._group_ends[group + 1]]
+
+    def close(self):
+        for values in self._columns.values():
+            values.release()
+        self._columns = {}
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Somebody still holds a view of a column; the mapping is closed once
+            # the last one is gone.
+            pass
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    file_name = args[0] if args else DEFAULT_SALES_FILE
+    with load(file_name, rebuild='--rebuild' in sys.argv) as sales:
+        print('{} sales from {} cities and {} payment types cached in {}'.format(
+            len(sales), len(sales.cities), len(sales.payment_types), sales.file_name))
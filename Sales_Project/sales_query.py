@@ -0,0 +1,184 @@
+'''
+Filters and top-N queries over the sales, answered from an index instead of a scan
+of every sale.
+
+The columnar cache (see sales_cache.py) stores the row numbers of the sales in
+groups, one for every (city, month, payment type) that has sales.  A filter like
+"Credit sales in Oakland in November" is exactly one group, and one that leaves a
+field out, or lists several values of it (like --month=11,12), is the handful of
+groups that match; either way only the sales that match are ever looked at, and
+counting them takes no more than adding up the sizes of the groups.  Top-N by
+amount keeps a heap of N rows rather than sorting every match.
+
+    python3 sales_query.py [sales file] [--city=Oakland] [--payment=Credit]
+        [--month=11] [--min=100.00] [--max=5000.00] [--top=10]
+
+Any filter can list several values, separated by commas.
+'''
+import heapq
+import sys
+from itertools import chain
+from operator import itemgetter
+from sales_aggregator import DEFAULT_SALES_FILE, format_cents, parse_cents
+import sales_cache
+
+# Fields the sales are grouped by in the index.  Filters use the same names.
+INDEXED_FIELDS = sales_cache.GROUP_KEY
+# Every filter keyword SalesIndex accepts.
+FILTERS = INDEXED_FIELDS + ('min_cents', 'max_cents')
+
+
+class SalesIndex(object):
+    '''
+    Queries over a sales_cache.SalesColumns, through its index of row numbers by
+    (city, month, payment type).  Opening one reads nothing but the list of groups.
+
+    Filters are passed as keyword arguments:
+        city, payment_type: a name, or a collection of names.
+        month: a month number, or a collection of them.
+        min_cents, max_cents: bounds on the amount, inclusive.
+    Any other keyword raises TypeError.
+
+    _____Attributes______
+
+    sales: SalesColumns.  The sales being indexed.
+
+    _____Methods_____
+
+    rows(self, **filters):
+        -- Returns the row numbers of every sale that matches, in file order.
+
+    count(self, **filters):
+        -- Returns how many sales match, without listing them.
+
+    total(self, **filters):
+        -- Returns the total amount of the sales that match, in cents.
+
+    top(self, n, **filters):
+        -- Returns the row numbers of the n largest sales that match, largest first.
+
+    record(self, row):
+        -- Returns one sale as a dictionary of city, month, day, payment_type and cents.
+    '''
+
+    def __init__(self, sales):
+        self.sales = sales
+        self._codes = {'city': {name: code for code, name in enumerate(sales.cities)},
+                       'payment_type': {name: code
+                                        for code, name in enumerate(sales.payment_types)}}
+        self._groups = sales.groups()
+
+    def _match(self, filters):
+        # Returns the index of every group whose codes pass every indexed filter.
+        for name in filters:
+            if name not in FILTERS:
+                raise TypeError('{} is not a sales filter; use one of {}'.format(
+                    name, ', '.join(FILTERS)))
+        allowed = []
+        for position, field in enumerate(INDEXED_FIELDS):
+            values = filters.get(field)
+            if values is None:
+                continue
+            if isinstance(values, (str, int)):
+                values = (values,)
+            codes = self._codes.get(field)
+            allowed.append((position, set(values) if codes is None
+                            else {codes[value] for value in values if value in codes}))
+        return [group for group, key in enumerate(self._groups)
+                if all(key[position] in codes for position, codes in allowed)]
+
+    def rows(self, **filters):
+        groups = self._match(filters)
+        if len(groups) == len(self._groups):
+            rows = list(range(len(self.sales)))
+        elif len(groups) == 1:
+            rows = self.sales.group_rows(groups[0]).tolist()
+        else:
+            # Each group is already in file order, so sorting only merges them.
+            rows = sorted(chain.from_iterable(
+                self.sales.group_rows(group) for group in groups))
+        return self._filter_amounts(rows, filters)
+
+    def _filter_amounts(self, rows, filters):
+        min_cents = filters.get('min_cents')
+        max_cents = filters.get('max_cents')
+        if min_cents is None and max_cents is None:
+            return rows
+        cents = self.sales.column('cents')
+        if min_cents is None:
+            return [row for row in rows if cents[row] <= max_cents]
+        if max_cents is None:
+            return [row for row in rows if cents[row] >= min_cents]
+        return [row for row in rows if min_cents <= cents[row] <= max_cents]
+
+    def count(self, **filters):
+        if 'min_cents' in filters or 'max_cents' in filters:
+            return len(self.rows(**filters))
+        group_rows = self.sales.group_rows
+        return sum(len(group_rows(group)) for group in self._match(filters))
+
+    def total(self, **filters):
+        rows = self.rows(**filters)
+        if not rows:
+            return 0
+        values = itemgetter(*rows)(self.sales.column('cents'))
+        return sum(values) if len(rows) > 1 else values
+
+    def top(self, n, **filters):
+        cents = self.sales.column('cents')
+        if not filters:
+            rows = range(len(self.sales))
+        else:
+            rows = self.rows(**filters)
+        return heapq.nlargest(n, rows, key=cents.__getitem__)
+
+    def record(self, row):
+        sales = self.sales
+        return {'city': sales.cities[sales.column('city')[row]],
+                'month': sales.column('month')[row],
+                'day': sales.column('day')[row],
+                'payment_type': sales.payment_types[sales.column('payment_type')[row]],
+                'cents': sales.column('cents')[row]}
+
+
+def open_index(file_name=DEFAULT_SALES_FILE):
+    '''
+    Loads file_name through the columnar cache, building the cache if needed, and
+    returns a SalesIndex over it.
+    '''
+    return SalesIndex(sales_cache.load(file_name))
+
+
+def filters_from_options(options):
+    '''
+    Turns command line options like city=Oakland,SF and min=100.00 into filter
+    keyword arguments for SalesIndex.
+    '''
+    filters = {}
+    if 'city' in options:
+        filters['city'] = options['city'].split(',')
+    if 'payment' in options:
+        filters['payment_type'] = options['payment'].split(',')
+    if 'month' in options:
+        filters['month'] = [int(month) for month in options['month'].split(',')]
+    if 'min' in options:
+        filters['min_cents'] = parse_cents(b'$' + options['min'].encode('utf-8'))
+    if 'max' in options:
+        filters['max_cents'] = parse_cents(b'$' + options['max'].encode('utf-8'))
+    return filters
+
+
+if __name__ == "__main__":
+    args = [arg for arg in sys.argv[1:] if not arg.startswith('--')]
+    options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+    index = open_index(args[0] if args else DEFAULT_SALES_FILE)
+    filters = filters_from_options(options)
+    rows = index.rows(**filters)
+    cents = index.sales.column('cents')
+    print('{} matching sales, total {}'.format(
+        len(rows), format_cents(sum(cents[row] for row in rows))))
+    if 'top' in options:
+        for row in index.top(int(options['top']), **filters):
+            record = index.record(row)
+            print('  {city:<16} {month:>2}/{day:<2}  {payment_type:<16}'.format(**record)
+                  + format_cents(record['cents']))
@@ -0,0 +1,60 @@
+import pytest
+import sales_cache
+from sales_aggregator import aggregate, aggregate_columns, parse_cents, split_fields
+
+ROWS = b'Oakland\t11/3\tCredit\t$12.50\nBoston\t1/18\tCash\t$7\nOakland\t11/30\tCredit\t$0.05\n'
+EXPECTED = {('Oakland', 11, 'Credit'): [2, 1255, 5, 1250], ('Boston', 1, 'Cash'): [1, 700, 700, 700]}
+
+
+def write(tmp_path, data):
+    file_name = str(tmp_path / 'sales.txt')
+    with open(file_name, 'wb') as sales_file:
+        sales_file.write(data)
+    return file_name
+
+
+def aggregate_cached(file_name):
+    with sales_cache.load(file_name) as sales:
+        return aggregate_columns(sales)
+
+
+@pytest.mark.parametrize('amount, cents', [(b'$2025.97', 202597), (b'$5554.7', 555470),
+                                           (b'$12', 1200), (b'$0.05', 5)])
+def test_parse_cents(amount, cents):
+    assert parse_cents(amount) == cents
+
+
+@pytest.mark.parametrize('amount', [b'$-5.50', b'$1.999', b'12.00', b'$', b'$1.', b'$.5',
+                                    b'$1 000', b'$+3'])
+def test_parse_cents_rejects_bad_amounts(amount):
+    with pytest.raises(ValueError):
+        parse_cents(amount)
+
+
+@pytest.mark.parametrize('reader', [lambda file_name: aggregate(file_name, 1),
+                                    aggregate_cached])
+def test_blank_lines_and_crlf_are_skipped(tmp_path, reader):
+    data = b'\n' + ROWS.replace(b'\n', b'\r\n').replace(b'\r\nBoston', b'\r\n\r\nBoston') + b'\n'
+    assert reader(write(tmp_path, data)) == EXPECTED
+
+
+@pytest.mark.parametrize('reader', [lambda file_name: aggregate(file_name, 1),
+                                    aggregate_cached])
+@pytest.mark.parametrize('bad_row', [
+    b'Miami\t2/2\tCash\t$1\textra',
+    b'Miami\t2/2\tCash',
+    b'Miami\t11\tCash\t$1.00',
+    b'Miami\t13/2\tCash\t$1.00',
+    b'Miami\t2/32\tCash\t$1.00',
+    b'Miami\t2/2\tCash\t$-5.50',
+    b'Miami\t2/2\tCash\t$1.999',
+])
+def test_bad_rows_are_rejected(tmp_path, reader, bad_row):
+    with pytest.raises(ValueError):
+        reader(write(tmp_path, ROWS + bad_row + b'\n' + ROWS))
+
+
+def test_split_fields():
+    assert split_fields(b'') == []
+    assert split_fields(b'\r\n\n') == []
+    assert split_fields(b'SF\t08/09\tCheck\t$1.5\n') == [b'SF', b'08/09', b'Check', b'$1.5']
@@ -0,0 +1,62 @@
+import random
+import pytest
+from sales_aggregator import format_cents
+from sales_query import open_index
+
+CITIES = ['Oakland', 'Boston', 'Palo Alto', 'Miami']
+PAYMENT_TYPES = ['Cash', 'Credit', 'Check']
+
+
+@pytest.fixture(scope='module')
+def sales(tmp_path_factory):
+    # A few thousand random sales, as the rows of the sales file and as a list of
+    # (city, month, payment type, cents) to check the index against.
+    rng = random.Random(5)
+    rows = [(rng.choice(CITIES), rng.randint(1, 12), rng.choice(PAYMENT_TYPES),
+             rng.randint(1, 1000000)) for _ in range(5000)]
+    file_name = str(tmp_path_factory.mktemp('sales') / 'sales.txt')
+    with open(file_name, 'w') as sales_file:
+        for city, month, payment_type, cents in rows:
+            sales_file.write('{}\t{}/{}\t{}\t{}\n'.format(
+                city, month, rng.randint(1, 28), payment_type, format_cents(cents)))
+    index = open_index(file_name)
+    yield index, rows
+    index.sales.close()
+
+
+def scan(rows, city=(), month=(), payment_type=(), min_cents=None, max_cents=None):
+    return [row for row, (row_city, row_month, row_payment_type, cents) in enumerate(rows)
+            if (not city or row_city in city) and (not month or row_month in month)
+            and (not payment_type or row_payment_type in payment_type)
+            and (min_cents is None or cents >= min_cents)
+            and (max_cents is None or cents <= max_cents)]
+
+
+@pytest.mark.parametrize('filters', [
+    {},
+    {'city': 'Oakland'},
+    {'city': ['Oakland', 'Miami'], 'month': [11, 12]},
+    {'payment_type': ['Cash', 'Check'], 'month': [1, 6, 7], 'min_cents': 250000},
+    {'city': ['Boston', 'Palo Alto', 'Nowhere'], 'payment_type': ['Credit'],
+     'max_cents': 500000},
+    {'city': 'Nowhere'},
+])
+def test_matches_a_scan(sales, filters):
+    index, rows = sales
+    scan_filters = {name: (value,) if isinstance(value, (str, int)) and 'cents' not in name
+                    else value for name, value in filters.items()}
+    expected = scan(rows, **scan_filters)
+    assert index.rows(**filters) == expected
+    assert index.count(**filters) == len(expected)
+    assert index.total(**filters) == sum(rows[row][3] for row in expected)
+    assert [rows[row][3] for row in index.top(5, **filters)] == \
+        sorted((rows[row][3] for row in expected), reverse=True)[:5]
+
+
+@pytest.mark.parametrize('method', ['rows', 'count', 'total'])
+def test_unknown_filter_is_rejected(sales, method):
+    index, rows = sales
+    with pytest.raises(TypeError):
+        getattr(index, method)(payment='Credit')
+    with pytest.raises(TypeError):
+        index.top(5, payment='Credit')
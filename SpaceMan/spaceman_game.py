@@ -0,0 +1,107 @@
+import string
+
+ALPHABET = string.ascii_lowercase
+# Number of incorrect guesses that draws all 7 parts of the Spaceman.
+MAX_INCORRECT_GUESSES = 7
+
+
+class SpacemanGame(object):
+    '''
+    The state of one game of Spaceman, updated a guess at a time.
+
+    Where each letter appears in the secret word is worked out once, up front, so a
+    guess only touches the positions it reveals, and the revealed pattern and the
+    number of letters still hidden are kept up to date instead of being rebuilt from
+    the list of guesses every round.  Guessed letters are a bitmask, one bit per
+    letter of ALPHABET.
+
+    _____Attributes______
+
+    secret_word: String.  The word being guessed.
+
+    positions: {String: (Int)}.  The positions of each letter in secret_word.
+
+    guessed: Int.  Bitmask of the letters guessed so far; bit 0 is 'a'.
+
+    letters_guessed: [String].  The letters guessed so far, in order.
+
+    revealed: [String].  secret_word with every letter not yet guessed replaced by
+        an underscore.
+
+    remaining: Int.  How many letters of secret_word are still hidden.
+
+    incorrect_guesses: Int.  How many guesses weren't in secret_word.
+
+    _____Methods_____
+
+    guess(self, letter):
+        -- Records a guess, reveals every position of letter in secret_word, and
+            returns how many positions were revealed (0 if letter isn't in it).
+
+    has_guessed(self, letter):
+        -- Returns True if letter has already been guessed.
+
+    is_word_guessed(self), is_lost(self), is_over(self):
+        -- Whether the player has won, has run out of guesses, or either.
+
+    get_guessed_word(self):
+        -- Returns the revealed pattern as a string, like 's_a_e_a_'.
+
+    get_available_letters(self):
+        -- Returns the letters of ALPHABET that haven't been guessed yet.
+    '''
+
+    def __init__(self, secret_word, max_incorrect_guesses=MAX_INCORRECT_GUESSES):
+        self.secret_word = secret_word
+        self.max_incorrect_guesses = max_incorrect_guesses
+        positions = {}
+        for position, letter in enumerate(secret_word):
+            positions.setdefault(letter, []).append(position)
+        self.positions = {letter: tuple(found) for letter, found in positions.items()}
+        self.guessed = 0
+        self.letters_guessed = []
+        self.revealed = ['_'] * len(secret_word)
+        self.remaining = len(secret_word)
+        self.incorrect_guesses = 0
+
+    @staticmethod
+    def _bit(letter):
+        if len(letter) != 1 or letter not in ALPHABET:
+            raise ValueError('{!r} is not a lowercase letter'.format(letter))
+        return 1 << (ord(letter) - ord('a'))
+
+    def has_guessed(self, letter):
+        return bool(self.guessed & self._bit(letter))
+
+    def guess(self, letter):
+        bit = self._bit(letter)
+        if self.guessed & bit:
+            raise ValueError('{!r} has already been guessed'.format(letter))
+        self.guessed |= bit
+        self.letters_guessed.append(letter)
+        found = self.positions.get(letter, ())
+        if not found:
+            self.incorrect_guesses += 1
+            return 0
+        revealed = self.revealed
+        for position in found:
+            revealed[position] = letter
+        self.remaining -= len(found)
+        return len(found)
+
+    def is_word_guessed(self):
+        return self.remaining == 0
+
+    def is_lost(self):
+        return self.incorrect_guesses >= self.max_incorrect_guesses
+
+    def is_over(self):
+        return self.remaining == 0 or self.incorrect_guesses >= self.max_incorrect_guesses
+
+    def get_guessed_word(self):
+        return ''.join(self.revealed)
+
+    def get_available_letters(self):
+        guessed = self.guessed
+        return ''.join(letter for index, letter in enumerate(ALPHABET)
+                       if not guessed >> index & 1)
@@ -0,0 +1,244 @@
+'''
+Plays Spaceman automatically, to find out which secret words are hardest to guess.
+
+The solver keeps the set of dictionary words that are still consistent with the
+partially guessed word, and always guesses the letter that appears in the most of
+them.  Candidate sets are bitmaps (Python ints, bit i for the i-th word of a
+length), and for every word length there is a precomputed bitmap of the words with
+each letter at each position, so narrowing the candidates after a guess is a few
+ANDs however many words there are.
+
+play_all() spreads games across a pool of worker processes, and reports games per
+second along with how many incorrect guesses each word took.
+
+    python3 spaceman_solver.py [--words=spaceman_words.txt] [--games=N] [--seed=42]
+        [--processes=N] [--difficulty=hard] [--length=8] [--hardest=20] [--output=difficulty.csv]
+
+Without --games, every word that matches --difficulty and --length is played once.
+With it, N words are picked at random (with repeats) instead.
+'''
+import csv
+import os
+import random
+import sys
+from multiprocessing import Pool
+from time import perf_counter
+from spaceman_game import ALPHABET, MAX_INCORRECT_GUESSES, SpacemanGame
+from word_source import WORDS_FILE, WordSource
+
+# How many games each worker plays per job.
+GAMES_PER_JOB = 1000
+
+if hasattr(int, 'bit_count'):
+    _popcount = int.bit_count
+else:
+    def _popcount(bits):
+        return bin(bits).count('1')
+
+
+class SpacemanSolver(object):
+    '''
+    Picks guesses for games of Spaceman from a dictionary of possible secret words.
+
+    _____Attributes______
+
+    words: {Int: [String]}.  The dictionary, grouped by word length.
+
+    _____Methods_____
+
+    new_game(self, length):
+        -- Returns the candidates bitmap for a new game with a secret word of this
+            length: every dictionary word of that length.
+
+    narrow(self, length, candidates, letter, positions):
+        -- Returns the candidates left after letter was guessed and revealed at
+            positions (empty if the letter wasn't in the secret word).
+
+    next_guess(self, length, candidates, guessed):
+        -- Returns the letter not in the guessed bitmask that appears in the most
+            candidates.
+
+    play(self, secret_word):
+        -- Plays a game against secret_word, and returns the SpacemanGame.
+    '''
+
+    def __init__(self, words):
+        self.words = {}
+        for word in words:
+            self.words.setdefault(len(word), []).append(word)
+        # (length, position, letter) -> bitmap of the words of that length with
+        # that letter at that position, and (length, letter) -> bitmap of the words
+        # of that length with that letter anywhere.
+        self._at = {}
+        self._contains = {}
+        for length, length_words in self.words.items():
+            self._index(length, length_words)
+        # Fallback order when no dictionary word fits (the secret word isn't in it).
+        letter_counts = {letter: 0 for letter in ALPHABET}
+        for word in words:
+            for letter in set(word):
+                if letter in letter_counts:
+                    letter_counts[letter] += 1
+        self._by_frequency = sorted(ALPHABET, key=lambda letter: -letter_counts[letter])
+
+    def _index(self, length, words):
+        # Builds each bitmap as a string of '0's and '1's (highest word first) and
+        # converts it in one go, rather than OR-ing in a bit per word.
+        count = len(words)
+        digits = {}
+        for index, word in enumerate(words):
+            digit = count - 1 - index
+            for position, letter in enumerate(word):
+                key = (position, letter)
+                row = digits.get(key)
+                if row is None:
+                    row = digits[key] = bytearray(b'0' * count)
+                row[digit] = ord('1')
+        for (position, letter), row in digits.items():
+            bits = int(row, 2)
+            self._at[(length, position, letter)] = bits
+            self._contains[(length, letter)] = self._contains.get((length, letter), 0) | bits
+
+    def new_game(self, length):
+        return (1 << len(self.words.get(length, ()))) - 1
+
+    def narrow(self, length, candidates, letter, positions):
+        contains = self._contains.get((length, letter), 0)
+        if not positions:
+            return candidates & ~contains
+        at = self._at
+        for position in positions:
+            candidates &= at.get((length, position, letter), 0)
+        # Words with letter at any other position too would have had it revealed.
+        others = 0
+        for position in range(length):
+            if position not in positions:
+                others |= at.get((length, position, letter), 0)
+        return candidates & ~others
+
+    def next_guess(self, length, candidates, guessed):
+        best_letter = None
+        best_count = 0
+        if candidates:
+            contains = self._contains
+            for index, letter in enumerate(ALPHABET):
+                if guessed >> index & 1:
+                    continue
+                count = _popcount(candidates & contains.get((length, letter), 0))
+                if count > best_count:
+                    best_letter = letter
+                    best_count = count
+        if best_letter is None:
+            for letter in self._by_frequency:
+                if not guessed >> (ord(letter) - ord('a')) & 1:
+                    return letter
+        return best_letter
+
+    def play(self, secret_word, max_incorrect_guesses=MAX_INCORRECT_GUESSES):
+        game = SpacemanGame(secret_word, max_incorrect_guesses)
+        length = len(secret_word)
+        candidates = self.new_game(length)
+        while not game.is_over():
+            letter = self.next_guess(length, candidates, game.guessed)
+            game.guess(letter)
+            candidates = self.narrow(length, candidates, letter, game.positions.get(letter, ()))
+        return game
+
+
+# Each worker process builds its own solver once, when it starts.
+_solver = None
+
+
+def _start_worker(file_name):
+    global _solver
+    with WordSource(file_name) as source:
+        _solver = SpacemanSolver(list(source.words()))
+
+
+def _play_words(words):
+    # Runs in a worker.  Returns (word, won, incorrect guesses, guesses) per game.
+    results = []
+    for word in words:
+        game = _solver.play(word)
+        results.append((word, game.is_word_guessed(), game.incorrect_guesses,
+                        len(game.letters_guessed)))
+    return results
+
+
+def play_all(words, processes=None, file_name=WORDS_FILE):
+    '''
+    Plays one game against each of words, spread across a pool of processes that
+    each use the dictionary in file_name, and returns a dictionary with:
+        games, wins, seconds, games_per_sec: totals for the whole batch.
+        words: {word: {'games', 'wins', 'incorrect_guesses', 'guesses'}}, summed over
+            every game played against that word.
+    '''
+    processes = processes or os.cpu_count()
+    jobs = [words[start:start + GAMES_PER_JOB] for start in range(0, len(words), GAMES_PER_JOB)]
+    started = perf_counter()
+    stats = {}
+    wins = 0
+    with Pool(processes, initializer=_start_worker, initargs=(file_name,)) as pool:
+        for results in pool.imap_unordered(_play_words, jobs):
+            for word, won, incorrect_guesses, guesses in results:
+                word_stats = stats.get(word)
+                if word_stats is None:
+                    word_stats = stats[word] = {'games': 0, 'wins': 0,
+                                                'incorrect_guesses': 0, 'guesses': 0}
+                word_stats['games'] += 1
+                word_stats['wins'] += won
+                word_stats['incorrect_guesses'] += incorrect_guesses
+                word_stats['guesses'] += guesses
+                wins += won
+    seconds = perf_counter() - started
+    return {'games': len(words), 'wins': wins, 'seconds': seconds,
+            'games_per_sec': len(words) / seconds if seconds else None, 'words': stats}
+
+
+def hardest(results, count):
+    '''
+    Returns the count words from play_all() results that took the most incorrect
+    guesses per game, hardest first.
+    '''
+    def difficulty(item):
+        word, word_stats = item
+        return (word_stats['incorrect_guesses'] / word_stats['games'],
+                word_stats['guesses'] / word_stats['games'])
+    return sorted(results['words'].items(), key=difficulty, reverse=True)[:count]
+
+
+def write_difficulty(results, file_name):
+    with open(file_name, 'w', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(('word', 'length', 'games', 'wins', 'mean_incorrect_guesses',
+                         'mean_guesses'))
+        for word, word_stats in sorted(results['words'].items()):
+            games = word_stats['games']
+            writer.writerow((word, len(word), games, word_stats['wins'],
+                             word_stats['incorrect_guesses'] / games,
+                             word_stats['guesses'] / games))
+
+
+if __name__ == "__main__":
+    options = dict(arg[2:].partition('=')[::2] for arg in sys.argv[1:] if arg.startswith('--'))
+    with WordSource(options.get('words', WORDS_FILE)) as source:
+        length = int(options['length']) if 'length' in options else None
+        difficulty = options.get('difficulty')
+        if 'games' in options:
+            rng = random.Random(int(options.get('seed', 42)))
+            words = [source.random_word(length, difficulty, rng)
+                     for _ in range(int(float(options['games'])))]
+        else:
+            words = list(source.words(length, difficulty))
+    results = play_all(words, int(options['processes']) if 'processes' in options else None,
+                       source.file_name)
+    print('{} games in {:.2f} seconds, {:.0f} games/sec, {:.2f}% won'.format(
+        results['games'], results['seconds'], results['games_per_sec'],
+        100.0 * results['wins'] / results['games']))
+    print('Hardest words:')
+    for word, word_stats in hardest(results, int(options.get('hardest', 20))):
+        print('  {:<16} {:.1f} incorrect guesses, won {} of {}'.format(
+            word, word_stats['incorrect_guesses'] / word_stats['games'],
+            word_stats['wins'], word_stats['games']))
+    if 'output' in options:
+        write_difficulty(results, options['output'])
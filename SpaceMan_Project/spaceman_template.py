@@ -1,12 +1,15 @@
 import random
-
-def load_word():
-   f = open('words.txt', 'r')
-   words_list = f.readlines()
-   f.close()
-
-   words_list = words_list[0].split(' ')
-   secret_word = random.choice(words_list)
+from spaceman_game import ALPHABET, SpacemanGame
+from word_source import get_source
+
+def load_word(length=None, difficulty=None):
+   '''
+   length: optional int, only pick words with this many letters.
+   difficulty: optional string, 'easy', 'medium' or 'hard' (see word_source.py).
+   returns: string, a random word from spaceman_words.txt.  The word list is indexed
+     the first time it's used, so later games don't read the whole list again.
+   '''
+   secret_word = get_source().random_word(length, difficulty, random)
    return secret_word
 
 def is_word_guessed(secret_word, letters_guessed):
@@ -16,8 +19,7 @@ def is_word_guessed(secret_word, letters_guessed):
     returns: boolean, True only if all the letters of secretWord are in lettersGuessed;
       False otherwise
     '''
-
-    # FILL IN YOUR CODE HERE...
+    return set(secret_word) <= set(letters_guessed)
 
 def get_guessed_word(secret_word, letters_guessed):
     '''
@@ -27,9 +29,8 @@ def get_guessed_word(secret_word, letters_guessed):
     guessed correctly, the string should contain the letter at the correct position.  For letters
     in the word that the user has not yet guessed, shown an _ (underscore) instead.
     '''
-    # FILL IN YOUR CODE HERE...
-
-
+    guessed = set(letters_guessed)
+    return ''.join(letter if letter in guessed else '_' for letter in secret_word)
 
 
 def get_available_letters(letters_guessed):
@@ -38,8 +39,8 @@ def get_available_letters(letters_guessed):
     returns: string, comprised of letters that represents what letters have not
       yet been guessed.
     '''
-
-
+    guessed = set(letters_guessed)
+    return ''.join(letter for letter in ALPHABET if letter not in guessed)
 
 
 def spaceman(secret_word):
@@ -59,10 +60,34 @@ def spaceman(secret_word):
     * After each round, you should also display to the user the
       partially guessed word so far, as well as letters that the
       user has not yet guessed.
-    '''
-    # FILL IN YOUR CODE HERE...
 
-
-#
-# secret_word = load_word()
-# spaceman(load_word())
+    The game state lives in a SpacemanGame (see spaceman_game.py), which updates
+    the partially guessed word as each letter is guessed instead of rebuilding it
+    from every guess so far.
+    '''
+    game = SpacemanGame(secret_word)
+    print('The secret word has {} letters.'.format(len(secret_word)))
+    while not game.is_over():
+        print('You have {} incorrect guesses left.'.format(
+            game.max_incorrect_guesses - game.incorrect_guesses))
+        print('Letters you haven\'t guessed yet: ' + game.get_available_letters())
+        letter = input('Guess a letter: ').strip().lower()
+        if len(letter) != 1 or letter not in ALPHABET:
+            print('Please guess a single letter.')
+            continue
+        if game.has_guessed(letter):
+            print('You already guessed {}.'.format(letter))
+            continue
+        if game.guess(letter):
+            print('Yes, {} is in the word!'.format(letter))
+        else:
+            print('Sorry, {} isn\'t in the word.'.format(letter))
+        print(game.get_guessed_word())
+    if game.is_word_guessed():
+        print('You win!  The word was {}.'.format(secret_word))
+    else:
+        print('The Spaceman is complete, you lose!  The word was {}.'.format(secret_word))
+
+
+if __name__ == "__main__":
+    spaceman(load_word())
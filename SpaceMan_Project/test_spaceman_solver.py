@@ -0,0 +1,47 @@
+import pytest
+from spaceman_game import ALPHABET
+from spaceman_solver import SpacemanSolver
+from word_source import WORDS_FILE, WordSource
+
+# With one incorrect guess allowed per letter, a game can only be lost by a solver
+# that guesses wrong or gets stuck, never by running out of guesses.
+UNLIMITED = len(ALPHABET)
+
+
+@pytest.fixture(scope='module')
+def words():
+    with WordSource(WORDS_FILE) as source:
+        return list(source.words())
+
+
+@pytest.fixture(scope='module')
+def solver(words):
+    return SpacemanSolver(words)
+
+
+def test_solves_every_word(words, solver):
+    unsolved = [word for word in words if not solver.play(word, UNLIMITED).is_word_guessed()]
+    assert unsolved == []
+
+
+def test_secret_word_stays_a_candidate():
+    words = ['cat', 'cot', 'cut', 'dog', 'dig', 'tab', 'tub', 'act']
+    solver = SpacemanSolver(words)
+    for index, secret_word in enumerate(words):
+        bit = 1 << index
+        game = solver.play(secret_word, UNLIMITED)
+        assert game.is_word_guessed()
+        candidates = solver.new_game(3)
+        for letter in game.letters_guessed:
+            positions = [position for position, secret_letter in enumerate(secret_word)
+                         if secret_letter == letter]
+            candidates = solver.narrow(3, candidates, letter, positions)
+            assert candidates & bit, (secret_word, letter)
+
+
+def test_solves_words_not_in_its_dictionary():
+    solver = SpacemanSolver(['apple', 'grape', 'lemon'])
+    for secret_word in ['zebra', 'quiz', 'xylophone']:
+        game = solver.play(secret_word, UNLIMITED)
+        assert game.is_word_guessed()
+        assert len(game.letters_guessed) == len(set(game.letters_guessed))
@@ -0,0 +1,190 @@
+'''
+Picks random secret words for Spaceman without reading the whole word list.
+
+The first time a word file is used, an index is written next to it
+(spaceman_words.txt.index) holding the byte offset of every word, grouped into one
+bucket per word length.  Picking a word is then a random index into a bucket, one
+offset read from the memory-mapped index, and one read from the memory-mapped word
+file.  The index is rebuilt whenever the word file's size or modification time
+changes, and get_source() keeps one WordSource per word file for the life of the
+process, so a game after the first one doesn't even reopen the files.
+'''
+import mmap
+import os
+import random
+import re
+import struct
+
+WORDS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'spaceman_words.txt')
+INDEX_EXTENSION = '.index'
+MAGIC = b'SPCIDX01'
+# Word file size, word file modification time (ns), number of words, longest word.
+HEADER = struct.Struct('<QqII')
+OFFSET = struct.Struct('<I')
+# Ranges of word lengths (inclusive, None for no limit) for each difficulty.
+DIFFICULTIES = {
+    'easy': (3, 5),
+    'medium': (6, 8),
+    'hard': (9, None),
+}
+WORD = re.compile(rb'\S+')
+
+# WordSources already opened by get_source(), keyed by absolute file name.
+_sources = {}
+
+
+def get_source(file_name=WORDS_FILE):
+    '''
+    Returns the WordSource for file_name, opening it the first time it's asked for
+    (or again if the word file has changed since).
+    '''
+    file_name = os.path.abspath(file_name)
+    source = _sources.get(file_name)
+    if source is None or not source.is_fresh():
+        if source is not None:
+            source.close()
+        source = _sources[file_name] = WordSource(file_name)
+    return source
+
+
+def build_index(file_name, index_file=None):
+    '''
+    Writes the offset index for file_name: the header, then the start of each
+    length's bucket (one per length from 0 to the longest word, plus the end), then
+    the offset of every word, sorted by length and in file order within a length.
+    '''
+    index_file = index_file or file_name + INDEX_EXTENSION
+    with open(file_name, 'rb') as words_file:
+        source = os.fstat(words_file.fileno())
+        if source.st_size == 0:
+            words = []
+        else:
+            with mmap.mmap(words_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                words = [(match.end() - match.start(), match.start())
+                         for match in WORD.finditer(data)]
+    longest = max((length for length, offset in words), default=0)
+    counts = [0] * (longest + 1)
+    for length, offset in words:
+        counts[length] += 1
+    starts = [0]
+    for count in counts:
+        starts.append(starts[-1] + count)
+    words.sort(key=lambda word: word[0])
+
+    # Named per process, so processes building the same index at once don't clash.
+    temporary = '{}.{}.tmp'.format(index_file, os.getpid())
+    with open(temporary, 'wb') as index:
+        index.write(MAGIC + HEADER.pack(source.st_size, source.st_mtime_ns, len(words), longest))
+        index.write(struct.pack('<{}I'.format(len(starts)), *starts))
+        index.write(struct.pack('<{}I'.format(len(words)), *[offset for length, offset in words]))
+    os.replace(temporary, index_file)
+    return index_file
+
+
+class WordSource(object):
+    '''
+    Random access to the words in a word file (words separated by spaces or newlines),
+    through the offset index that build_index() writes.
+
+    _____Attributes______
+
+    file_name: String.  The word file.
+
+    _____Methods_____
+
+    random_word(self, length=None, difficulty=None, rng=random):
+        -- Returns a random word, optionally only of the given length, or of one of
+            the lengths of a difficulty from DIFFICULTIES.
+
+    count(self, length=None, difficulty=None):
+        -- Returns how many words random_word() picks from with the same arguments.
+
+    words(self, length=None, difficulty=None):
+        -- Yields every one of those words, grouped by length.
+    '''
+
+    def __init__(self, file_name=WORDS_FILE, index_file=None):
+        self.file_name = file_name
+        self.index_file = index_file or file_name + INDEX_EXTENSION
+        if not self._index_is_fresh():
+            build_index(file_name, self.index_file)
+        with open(self.index_file, 'rb') as index:
+            self._index = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+        (self._size, self._mtime_ns, self._word_count,
+         self.longest) = HEADER.unpack_from(self._index, len(MAGIC))
+        self._starts_at = len(MAGIC) + HEADER.size
+        self._offsets_at = self._starts_at + (self.longest + 2) * OFFSET.size
+        self._words = None
+        if self._word_count:
+            with open(file_name, 'rb') as words_file:
+                self._words = mmap.mmap(words_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def _index_is_fresh(self):
+        try:
+            with open(self.index_file, 'rb') as index:
+                header = index.read(len(MAGIC) + HEADER.size)
+        except FileNotFoundError:
+            return False
+        if len(header) < len(MAGIC) + HEADER.size or header[:len(MAGIC)] != MAGIC:
+            return False
+        size, mtime_ns, word_count, longest = HEADER.unpack_from(header, len(MAGIC))
+        source = os.stat(self.file_name)
+        return size == source.st_size and mtime_ns == source.st_mtime_ns
+
+    def is_fresh(self):
+        '''
+        Returns False if the word file has changed since this WordSource opened it.
+        '''
+        source = os.stat(self.file_name)
+        return self._size == source.st_size and self._mtime_ns == source.st_mtime_ns
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __len__(self):
+        return self._word_count
+
+    def _bucket_start(self, length):
+        # Start of the bucket of words of this length, in words.
+        length = min(max(length, 0), self.longest + 1)
+        return OFFSET.unpack_from(self._index, self._starts_at + length * OFFSET.size)[0]
+
+    def _range(self, length, difficulty):
+        # The range of positions in the sorted offsets to pick from.
+        if difficulty is not None:
+            shortest, longest = DIFFICULTIES[difficulty]
+        else:
+            shortest, longest = length, length
+        if shortest is None:
+            shortest = 0
+        if longest is None:
+            longest = self.longest
+        return self._bucket_start(shortest), self._bucket_start(longest + 1)
+
+    def _word_at(self, position):
+        offset = OFFSET.unpack_from(self._index, self._offsets_at + position * OFFSET.size)[0]
+        return WORD.match(self._words, offset).group().decode('utf-8')
+
+    def count(self, length=None, difficulty=None):
+        start, end = self._range(length, difficulty)
+        return end - start
+
+    def random_word(self, length=None, difficulty=None, rng=random):
+        start, end = self._range(length, difficulty)
+        if start >= end:
+            raise ValueError('no words of length {} or difficulty {} in {}'.format(
+                length, difficulty, self.file_name))
+        return self._word_at(rng.randrange(start, end))
+
+    def words(self, length=None, difficulty=None):
+        start, end = self._range(length, difficulty)
+        for position in range(start, end):
+            yield self._word_at(position)
+
+    def close(self):
+        self._index.close()
+        if self._words is not None:
+            self._words.close()